@@ -3,16 +3,12 @@
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.widgets import Slider
+from fmrilib.t2star import relaxation_T2star
+from fmrilib.interactive import UpdateScheduler
 
 
 # =============================================================================
-def relaxation_T2star(time, S0=100, T2star=28):
-    return S0 * np.exp(-time/T2star)
-
-
-def update(val):
-    S0 = sS0.val
-    T2star = sT2star.val
+def update(S0, T2star):
     l.set_ydata(relaxation_T2star(time, S0=S0, T2star=T2star))
     fig.canvas.draw_idle()
 
@@ -44,7 +40,7 @@ axT2star = plt.axes([0.25, 0.15, 0.65, 0.03], facecolor=axcolor)
 sS0 = Slider(axS0, "$S_0$", 0, 200, valinit=100, valstep=10)
 sT2star = Slider(axT2star, r"$T_{2}^*$", 1, 100, valinit=28, valstep=1)
 
-sS0.on_changed(update)
-sT2star.on_changed(update)
+# One update per frame with the latest slider values
+scheduler = UpdateScheduler(fig, update, {"S0": sS0, "T2star": sT2star})
 
 plt.show()
@@ -3,25 +3,12 @@
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.widgets import Slider
+from fmrilib.t2star import relaxation_T2star_Uludag2009
+from fmrilib.interactive import UpdateScheduler
 
 
 # =============================================================================
-def relaxation_T2star(time, S0=100, T2star=28):
-    return S0 * np.exp(-time/T2star)
-
-
-def relaxation_T2star_Uludag2009(time, S0=100, T2star_in=22.3, T2star_ex=25.1,
-                                 CBV=0.01):
-    Sex = relaxation_T2star(time, S0, T2star_ex)
-    Sin = relaxation_T2star(time, S0, T2star_in)
-    return (1 - CBV) * Sex + CBV * Sin
-
-
-def update(val):
-    S0 = sS0.val
-    T2star_ex = sT2star_ex.val
-    T2star_in = sT2star_in.val
-    CBV = sCBV.val
+def update(S0, T2star_ex, T2star_in, CBV):
     l.set_ydata(relaxation_T2star_Uludag2009(
         time, S0=S0, CBV=CBV, T2star_in=T2star_in, T2star_ex=T2star_ex))
     fig.canvas.draw_idle()
@@ -32,7 +19,8 @@ def update(val):
 T2star_a = 37.5
 T2star_v = 12.2
 T2star_c = (T2star_a + T2star_v) / 2
-T2star_in = 0.2 * T2star_a + 0.4 * T2star_v + 0.4 * T2star_c
+# Intravascular blood: 20% arterial, 40% venous, 40% capillary
+T2star_in = np.dot([0.2, 0.4, 0.4], [T2star_a, T2star_v, T2star_c])
 T2star_ex = 25.1
 S0 = 100
 CBV = 0.05
@@ -63,10 +51,9 @@ sT2star_ex = Slider(axT2star_ex, r"$T_{2,ex}^*$", 1, 100, valinit=T2star_ex, val
 sT2star_in = Slider(axT2star_in, r"$T_{2,in}^*$", 1, 100, valinit=T2star_in, valstep=1)
 sCBV = Slider(axCBV, "$CBV$", 0, 1, valinit=0.1, valstep=0.01)
 
-sS0.on_changed(update)
-sT2star_ex.on_changed(update)
-sT2star_in.on_changed(update)
-sCBV.on_changed(update)
+# One update per frame with the latest slider values
+scheduler = UpdateScheduler(fig, update, {
+    "S0": sS0, "T2star_ex": sT2star_ex, "T2star_in": sT2star_in, "CBV": sCBV})
 
 
 plt.show()
@@ -1,11 +1,11 @@
 """Create a bunch of complex numbers."""
 
-import random
 import numpy as np
 import matplotlib
 import matplotlib.pyplot as plt
 from matplotlib.widgets import Slider, Button
-import tkinter as tk
+from fmrilib.views import ComplexNoiseView, Blitter
+from fmrilib.interactive import UpdateScheduler
 
 global COMP
 
@@ -21,52 +21,17 @@ MAG = np.abs(COMP)
 PHA = np.angle(COMP) % (2*np.pi) * (180/np.pi)
 
 # =============================================================================
-def generate_complex_data(nr_samples=9, mean_x=0, mean_y=0, std=1, seed=0):
-    np.random.seed(seed)
-    data_real = np.random.normal(loc=mean_x, scale=std, size=nr_samples)
-    data_imag = np.random.normal(loc=mean_y, scale=std, size=nr_samples)
-    return data_real + 1j * data_imag
-
-
-def plot_complex_data(ax, data):
-    ax.cla()
-    ax.scatter(data.real, data.imag, s=3, alpha=1, color='black', marker='o', 
-        linewidth=0)
-    ax.set_aspect('equal')
-    ax.set_xlabel('Re')
-    ax.set_ylabel('Im')
-    ax.set_title('Complex Signal')
-    ax.axhline(y=0, color='black', linestyle='-')
-    ax.axvline(x=0, color='black', linestyle='-')
-    ax.set_xlim([-150, 150])
-    ax.set_ylim([-150, 150])
-
-
-def plot_lines(ax, mean_x, mean_y, std):
-    # Maginute line
-    ax.plot([0, mean_x], [0, mean_y], color='black', linestyle='-', 
-        linewidth=0.5)
-
-    # Spread circle
-    circle = plt.Circle((mean_x, mean_y), radius=std, color='black', 
-        fill=False, linestyle='-', linewidth=0.5, label='Circle')
-    ax.add_patch(circle)
-
-
-def update(val):
-    MAG = sMAG.val
-    PHA = sPHA.val / 360 * 2 * np.pi
+def update(seed, std, mag, pha):
+    MAG = mag
+    PHA = pha / 360 * 2 * np.pi
     COMP = MAG* np.cos(PHA) + 1j * (MAG* np.sin(PHA))
 
+    # Runs inside the scheduler, so these do not trigger another update
     sMEAN_X.set_val(COMP.real)
     sMEAN_Y.set_val(COMP.imag)
 
-    data = generate_complex_data(NR_SAMPLES, sMEAN_X.val, sMEAN_Y.val, sSTD.val, sSEED.val)
-    plot_complex_data(fig1ax1, data)
-    plot_lines(fig1ax1, sMEAN_X.val, sMEAN_Y.val, sSTD.val)
-    fig1.canvas.draw_idle()
-    update_histograms(fig3ax, data)
-    fig3.canvas.draw_idle()
+    blitter.update(view.update(mean_x=sMEAN_X.val, mean_y=sMEAN_Y.val,
+                               std=std, seed=seed))
 
 
 def close_all(event):
@@ -88,11 +53,6 @@ fig1, (fig1ax1) = plt.subplots(1, 1)
 manager = plt.get_current_fig_manager()
 manager.window.wm_geometry("500x500+0+0")
 
-# Plot
-data = generate_complex_data(NR_SAMPLES, MEAN_X, MEAN_Y, STD, SEED)
-plot_complex_data(fig1ax1, data)
-plot_lines(fig1ax1, MEAN_X, MEAN_Y, STD)
-
 # =============================================================================
 # Plot Controls
 # =============================================================================
@@ -119,10 +79,9 @@ sSTD = Slider(axSTD, "Std. X", 0, 50, valinit=STD, valstep=1)
 sMAG = Slider(axMAG, "Mag.", 0, 200, valinit=MAG, valstep=1)
 sPHA = Slider(axPHA, "Pha.", 0, 360, valinit=PHA, valstep=1)
 
-sSEED.on_changed(update)
-sSTD.on_changed(update)
-sMAG.on_changed(update)
-sPHA.on_changed(update)
+# One update per frame with the latest slider values
+scheduler = UpdateScheduler(fig2, update, {
+    "seed": sSEED, "std": sSTD, "mag": sMAG, "pha": sPHA})
 
 # -----------------------------------------------------------------------------
 # Buttons
@@ -140,28 +99,12 @@ fig3, fig3ax = plt.subplots(2, 2)
 manager = plt.get_current_fig_manager()
 manager.window.wm_geometry("1050x400+0+575")
 
-def update_histograms(ax, data):
-    ax[0, 0].clear()
-    ax[0, 0].hist(data.real, range=(-200, 200), bins=200, edgecolor=None)
-    ax[0, 0].set_title('Real')
-
-    ax[0, 1].clear()
-    ax[0, 1].hist(data.imag, range=(-200, 200), bins=200, edgecolor=None)
-    ax[0, 1].set_title('Imag')
-
-    MAG = np.abs(data)
-    PHA = np.angle(data) % (2*np.pi) * (180/np.pi)
-
-    ax[1, 0].clear()
-    ax[1, 0].hist(MAG, range=(0, 400), bins=200, edgecolor=None)
-    ax[1, 0].set_title('Magnitude')
-
-    ax[1, 1].clear()
-    ax[1, 1].hist(PHA, range=(0, 360), bins=180, edgecolor=None)
-    ax[1, 1].set_title('Phase [deg]')
-
-update_histograms(fig3ax, data)
+# Scatter and histograms are persistent artists, slider moves only redraw them
+view = ComplexNoiseView(fig1ax1, fig3ax, sticky_ylim=True,
+                        nr_samples=NR_SAMPLES, mean_x=MEAN_X, mean_y=MEAN_Y,
+                        std=STD, seed=SEED)
 fig3.tight_layout()
+blitter = Blitter(fig1, fig3)
 
 # -----------------------------------------------------------------------------
 # Show plot
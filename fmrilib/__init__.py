@@ -0,0 +1 @@
+"""Compute kernels of the understanding fMRI simulations."""
@@ -0,0 +1,3 @@
+from fmrilib.cli import main
+
+main()
@@ -0,0 +1,169 @@
+"""Command line interface to run the simulations without a GUI.
+
+Examples
+--------
+python -m fmrilib list
+python -m fmrilib run vaso -p T1=1.5 -p max_time=20 -o vaso.npz
+python -m fmrilib import-time
+python -m fmrilib render boxerman1995 -g theta_deg=0:360:13 -g R=2,5 -j 4 \
+    -o frames --sheet sheet.png
+"""
+import argparse
+import inspect
+import os
+import subprocess
+import sys
+import numpy as np
+
+GUI_MODULES = ("matplotlib", "tkinter", "PyQt5", "PySide6")
+
+
+# =============================================================================
+def _split(text):
+    key, sep, value = text.partition("=")
+    if not sep:
+        raise argparse.ArgumentTypeError(
+            "expected KEY=VALUE, got '{}'".format(text))
+    return key, value
+
+
+def parse_param(text):
+    """Parse KEY=VALUE where VALUE is a single number."""
+    key, value = _split(text)
+    try:
+        return key, float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            "expected a number for '{}', got '{}'".format(key, value))
+
+
+def parse_grid(text):
+    """Parse KEY=VALUES where VALUES is a,b,c or START:STOP:NUM."""
+    key, value = _split(text)
+    try:
+        if value.count(":") == 2:
+            start, stop, num = value.split(":")
+            return key, np.linspace(float(start), float(stop), int(num))
+        return key, np.array([float(v) for v in value.split(",")])
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            "expected numbers for '{}', got '{}'".format(key, value))
+
+
+def check_params(model, names):
+    """Exit with a message if a name is not a parameter of the model."""
+    from fmrilib.models import MODELS
+    known = inspect.signature(MODELS[model]).parameters
+    unknown = [name for name in names if name not in known]
+    if unknown:
+        sys.exit("Unknown parameter(s) {} of model '{}', choose from: {}"
+                 .format(", ".join(unknown), model, ", ".join(known)))
+
+
+def cmd_list(args):
+    from fmrilib.models import MODELS
+    for name, model in MODELS.items():
+        params = inspect.signature(model).parameters.values()
+        print("{:<14} {}".format(name, inspect.getdoc(model)))
+        print("{:<14} {}".format("", ", ".join(
+            "{}={}".format(p.name, p.default) for p in params)))
+
+
+def cmd_run(args):
+    from fmrilib.models import MODELS
+    if args.model not in MODELS:
+        sys.exit("Unknown model '{}', choose from: {}".format(
+            args.model, ", ".join(MODELS)))
+    params = dict(args.param)
+    check_params(args.model, params)
+    results = MODELS[args.model](**params)
+    if args.output:
+        np.savez(args.output, **results)
+    for name, value in results.items():
+        print("{:<10} shape={} min={:.6g} max={:.6g}".format(
+            name, value.shape, np.min(np.abs(value)), np.max(np.abs(value))))
+
+
+def cmd_import_time(args):
+    """Import every compute module in a fresh interpreter and time it."""
+    from fmrilib.models import COMPUTE_MODULES
+    code = (
+        "import sys, time; t0 = time.perf_counter(); import {}; "
+        "t = time.perf_counter() - t0; "
+        "gui = [m for m in {!r} if m in sys.modules]; "
+        "print('{{:.1f}} {{}}'.format(t * 1000, ','.join(gui) or '-'))")
+    baseline = subprocess.run(
+        [sys.executable, "-c", code.format("numpy", GUI_MODULES)],
+        capture_output=True, text=True, check=True).stdout.split()[0]
+    print("{:<28} {:>9}  {}".format("module", "time [ms]", "GUI modules"))
+    print("{:<28} {:>9}  {}".format("numpy", baseline, "-"))
+    failed = False
+    for module in COMPUTE_MODULES:
+        out = subprocess.run(
+            [sys.executable, "-c", code.format(module, GUI_MODULES)],
+            capture_output=True, text=True, check=True).stdout.split()
+        print("{:<28} {:>9}  {}".format(module, *out))
+        failed |= out[1] != "-"
+    if failed:
+        sys.exit("Some compute modules import a GUI stack.")
+
+
+def cmd_render(args):
+    from fmrilib.render import render_grid
+    from fmrilib.views import FIGURES
+    if args.model not in FIGURES:
+        sys.exit("Unknown model '{}', choose from: {}".format(
+            args.model, ", ".join(FIGURES)))
+    if args.output is None and args.sheet is None:
+        sys.exit("Nothing to do, give --output and/or --sheet.")
+    paths = render_grid(args.model, dict(args.grid), out_dir=args.output,
+                        sheet=args.sheet, nr_columns=args.columns,
+                        stride=args.stride, dpi=args.dpi,
+                        nr_workers=args.workers)
+    print("Rendered {} frames.".format(len(paths)) if paths else
+          "Rendered {}.".format(args.sheet))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="fmrilib", description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("list", help="List the models and their parameters.")
+    p.set_defaults(func=cmd_list)
+
+    p = sub.add_parser("run", help="Run a model and save its arrays.")
+    p.add_argument("model")
+    p.add_argument("-p", "--param", type=parse_param, action="append",
+                   default=[], metavar="KEY=VALUE",
+                   help="Model parameter, repeatable.")
+    p.add_argument("-o", "--output", help="Save the results to a .npz file.")
+    p.set_defaults(func=cmd_run)
+
+    p = sub.add_parser("import-time",
+                       help="Measure cold import time of compute modules.")
+    p.set_defaults(func=cmd_import_time)
+
+    p = sub.add_parser("render",
+                       help="Render model figures over a parameter grid.")
+    p.add_argument("model")
+    p.add_argument("-g", "--grid", type=parse_grid, action="append",
+                   default=[], metavar="KEY=VALUES",
+                   help="Parameter values (a,b,c or start:stop:num), "
+                        "repeatable. The grid is their product.")
+    p.add_argument("-o", "--output", help="Directory for one PNG per frame.")
+    p.add_argument("--sheet", help="Save a contact sheet of all frames.")
+    p.add_argument("--columns", type=int, help="Columns of the sheet.")
+    p.add_argument("--stride", type=int, default=4,
+                   help="Pixel decimation of the frames in the sheet.")
+    p.add_argument("--dpi", type=float, default=100.)
+    p.add_argument("-j", "--workers", type=int, default=os.cpu_count(),
+                   help="Worker processes (default: all cores).")
+    p.set_defaults(func=cmd_render)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Complex Gaussian noise sampling.
+
+Samples are produced in fixed-size chunks. Chunk i is drawn from its own
+np.random.Generator seeded with child i of np.random.SeedSequence(seed), so
+for a given seed and chunk_size the samples are identical whether chunks are
+drawn in sequence or in any number of worker processes.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+import numpy as np
+
+
+# =============================================================================
+def _complex_chunk(args):
+    seed, nr_samples, mean_x, mean_y, std = args
+    rng = np.random.default_rng(seed)
+    data_real = rng.normal(loc=mean_x, scale=std, size=nr_samples)
+    data_imag = rng.normal(loc=mean_y, scale=std, size=nr_samples)
+    return data_real + 1j * data_imag
+
+
+def iter_complex_data(nr_samples=9, mean_x=0, mean_y=0, std=1, seed=0,
+                      chunk_size=2**20, nr_workers=1):
+    """Yield complex samples in chunks of chunk_size (last may be shorter).
+
+    With nr_workers > 1 the chunks are drawn in a process pool, at most
+    2 * nr_workers chunks ahead of the consumer so memory stays bounded.
+    """
+    chunk_size = max(int(chunk_size), 1)
+    sizes = [chunk_size] * (nr_samples // chunk_size)
+    if nr_samples % chunk_size:
+        sizes.append(nr_samples % chunk_size)
+    seeds = np.random.SeedSequence(int(seed)).spawn(len(sizes))
+    tasks = ((s, n, mean_x, mean_y, std) for s, n in zip(seeds, sizes))
+
+    if nr_workers > 1:
+        with ProcessPoolExecutor(max_workers=nr_workers) as executor:
+            pending = deque()
+            for task in tasks:
+                pending.append(executor.submit(_complex_chunk, task))
+                if len(pending) >= 2 * nr_workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+    else:
+        for task in tasks:
+            yield _complex_chunk(task)
+
+
+def generate_complex_data(nr_samples=9, mean_x=0, mean_y=0, std=1, seed=0,
+                          chunk_size=None, nr_workers=1):
+    """All samples in one array, drawn as a single chunk by default."""
+    if chunk_size is None:
+        chunk_size = max(nr_samples, 1)
+    chunks = list(iter_complex_data(nr_samples, mean_x, mean_y, std, seed,
+                                    chunk_size, nr_workers))
+    if not chunks:
+        return np.zeros(0, dtype=complex)
+    return np.concatenate(chunks)
@@ -0,0 +1,92 @@
+"""Streaming statistics of complex samples.
+
+Magnitude and phase follow the conventions of the histograms in
+03_generate_complex_numbers.py: magnitude is abs(data) and phase is
+angle(data) wrapped to [0, 360) degrees.
+"""
+import numpy as np
+
+CHANNELS = ("real", "imag", "magnitude", "phase")
+
+
+# =============================================================================
+def magnitude_phase(data):
+    """Magnitude and phase in degrees [0, 360) of complex data."""
+    return np.abs(data), np.angle(data) % (2*np.pi) * (180/np.pi)
+
+
+class ComplexStatistics:
+    """Accumulate histograms, mean and variance of complex chunks.
+
+    Memory does not depend on the number of samples. The running mean and
+    variance use Welford's update generalized to chunks (Chan et al.), so
+    accumulators of different workers can be merged.
+
+    Parameters
+    ----------
+    ranges : dict
+        Histogram range per channel.
+    bins : dict
+        Number of histogram bins per channel.
+    """
+
+    def __init__(self, ranges=None, bins=None):
+        self.ranges = {"real": (-200, 200), "imag": (-200, 200),
+                       "magnitude": (0, 400), "phase": (0, 360)}
+        self.bins = {"real": 200, "imag": 200, "magnitude": 200,
+                     "phase": 180}
+        self.ranges.update(ranges or {})
+        self.bins.update(bins or {})
+        self.counts = {c: np.zeros(self.bins[c], dtype=np.int64)
+                       for c in CHANNELS}
+        self.n = 0
+        self._mean = dict.fromkeys(CHANNELS, 0.)
+        self._M2 = dict.fromkeys(CHANNELS, 0.)
+
+    def edges(self, channel):
+        """Histogram bin edges of a channel."""
+        return np.linspace(*self.ranges[channel], self.bins[channel] + 1)
+
+    def update(self, data):
+        """Add a chunk of complex samples."""
+        data = np.asarray(data).ravel()
+        if data.size == 0:
+            return self
+        magnitude, phase = magnitude_phase(data)
+        values = dict(zip(CHANNELS, (data.real, data.imag, magnitude, phase)))
+        for c, x in values.items():
+            self.counts[c] += np.histogram(x, bins=self.bins[c],
+                                           range=self.ranges[c])[0]
+            self._combine(c, x.size, x.mean(), np.sum((x - x.mean())**2))
+        self.n += data.size
+        return self
+
+    def merge(self, other):
+        """Add the samples accumulated by another instance."""
+        for c in CHANNELS:
+            self.counts[c] += other.counts[c]
+            self._combine(c, other.n, other._mean[c], other._M2[c])
+        self.n += other.n
+        return self
+
+    def _combine(self, c, n, mean, M2):
+        total = self.n + n
+        if total == 0:
+            return
+        delta = mean - self._mean[c]
+        self._mean[c] += delta * n / total
+        self._M2[c] += M2 + delta**2 * self.n * n / total
+
+    @property
+    def mean(self):
+        return dict(self._mean)
+
+    @property
+    def var(self):
+        """Sample variance (ddof=1) per channel."""
+        return {c: self._M2[c] / (self.n - 1) if self.n > 1 else np.nan
+                for c in CHANNELS}
+
+    @property
+    def std(self):
+        return {c: np.sqrt(v) for c, v in self.var.items()}
@@ -0,0 +1,64 @@
+"""Static dephasing signal of a field map.
+
+Without diffusion, the gradient echo signal of a voxel at echo time TE is
+the mean of exp(i * gamma * DeltaB * TE) over the voxel. It only depends on
+the distribution of DeltaB, so the field map is binned into a frequency
+histogram once and the signal of any number of echo times is a small
+histogram weighted sum.
+"""
+import numpy as np
+
+
+# =============================================================================
+def field_histogram(field, nr_bins=2048, mask=None):
+    """Normalized histogram of a field map.
+
+    Returns
+    -------
+    centers : ndarray, shape (nr_bins,)
+    weights : ndarray, shape (nr_bins,)
+        Fraction of the (masked) voxels in each bin, sums to 1.
+    width : float
+        Bin width.
+    """
+    field = np.asarray(field)
+    if mask is not None:
+        field = field[mask]
+    counts, edges = np.histogram(field, bins=nr_bins)
+    centers = (edges[:-1] + edges[1:]) / 2
+    return centers, counts / counts.sum(), edges[1] - edges[0]
+
+
+def static_dephasing_signal(field, TE, gamma=1., nr_bins=2048, mask=None,
+                            histogram=None):
+    """Magnitude and phase of the static dephasing signal at each TE.
+
+    Each bin contributes exp(i * gamma * center * TE) times the mean of the
+    phase factor over a uniform bin, sinc(gamma * width * TE / (2 pi)),
+    which removes most of the binning error.
+
+    Parameters
+    ----------
+    field : ndarray
+        Field map, e.g. from compute_DeltaBvessel.
+    TE : array_like, shape (n_TE,)
+    gamma : float
+        Converts field units to angular frequency per TE unit.
+    nr_bins : int
+    mask : ndarray of bool, optional
+        Voxels that contribute to the signal.
+    histogram : tuple, optional
+        Output of field_histogram, to reuse it between calls.
+
+    Returns
+    -------
+    magnitude, phase : ndarray, shape (n_TE,)
+    """
+    if histogram is None:
+        histogram = field_histogram(field, nr_bins=nr_bins, mask=mask)
+    centers, weights, width = histogram
+    TE = np.asarray(TE, dtype=float)
+    omega_TE = gamma * np.multiply.outer(TE, centers)
+    signal = np.exp(1j * omega_TE) @ weights
+    signal *= np.sinc(gamma * width * TE / (2*np.pi))
+    return np.abs(signal), np.angle(signal)
@@ -0,0 +1,120 @@
+"""Delta B of 3D vessel networks through FFT dipole convolution.
+
+The field offset (in units of B0) of a susceptibility distribution chi is
+the convolution of chi with the dipole kernel, which is a multiplication in
+k-space with D(k) = 1/3 - (k . b0)^2 / |k|^2. The Lorentz sphere term is
+included, so an infinite cylinder at angle theta to B0 reproduces the
+closed form intravascular and extravascular fields of fmrilib.boxerman with
+S = chi / 2.
+
+References
+----------
+- Salomir, R., de Senneville, B.D., Moonen, C.T., 2003. A fast calculation
+method for magnetic field inhomogeneity due to an arbitrary distribution of
+bulk susceptibility. Concepts in Magnetic Resonance Part B 19B, 26–34.
+https://doi.org/10.1002/cmr.b.10083
+
+"""
+from functools import lru_cache
+import numpy as np
+
+
+# =============================================================================
+def grid_coordinates(shape, voxel_size=(1., 1., 1.)):
+    """Voxel center coordinates along each axis, centered on the volume."""
+    return [(np.arange(n) - (n - 1) / 2) * d
+            for n, d in zip(shape, voxel_size)]
+
+
+@lru_cache(maxsize=4)
+def dipole_kernel(shape, voxel_size=(1., 1., 1.), B0_dir=(0., 0., 1.)):
+    """Dipole kernel on the rfftn half spectrum, cached per grid.
+
+    The returned array is shared between calls and therefore read-only.
+    """
+    b0 = np.asarray(B0_dir, dtype=float)
+    b0 = b0 / np.linalg.norm(b0)
+    kx = np.fft.fftfreq(shape[0], voxel_size[0])[:, None, None]
+    ky = np.fft.fftfreq(shape[1], voxel_size[1])[None, :, None]
+    kz = np.fft.rfftfreq(shape[2], voxel_size[2])[None, None, :]
+    k2 = kx**2 + ky**2 + kz**2
+    kb = kx * b0[0] + ky * b0[1] + kz * b0[2]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        kernel = 1/3 - kb**2 / k2
+    kernel[0, 0, 0] = 0.
+    kernel.flags.writeable = False
+    return kernel
+
+
+def voxelize_vessels(shape, start, end, radius, chi, voxel_size=(1., 1., 1.)):
+    """Susceptibility volume of cylindrical vessel segments.
+
+    Parameters
+    ----------
+    shape : tuple of 3 ints
+    start, end : array_like, shape (n_vessels, 3)
+        End points of the segment axes, in the units of voxel_size with the
+        origin at the volume center. Segments that run through the whole
+        volume act as infinite cylinders under the periodic FFT.
+    radius, chi : array_like, shape (n_vessels,)
+        Vessel radii and susceptibility differences. Where vessels overlap
+        the later one wins.
+    voxel_size : tuple of 3 floats
+
+    Returns
+    -------
+    volume : ndarray, shape shape
+    """
+    start = np.atleast_2d(np.asarray(start, dtype=float))
+    end = np.atleast_2d(np.asarray(end, dtype=float))
+    radius = np.broadcast_to(np.asarray(radius, dtype=float), start.shape[:1])
+    chi = np.broadcast_to(np.asarray(chi, dtype=float), start.shape[:1])
+    coords = grid_coordinates(shape, voxel_size)
+    volume = np.zeros(shape)
+
+    for a, b, r, c in zip(start, end, radius, chi):
+        # Only visit the bounding box of the segment
+        box = []
+        for x, lo, hi in zip(coords, np.minimum(a, b) - r,
+                             np.maximum(a, b) + r):
+            box.append(slice(np.searchsorted(x, lo),
+                             np.searchsorted(x, hi, side='right')))
+        px = coords[0][box[0], None, None] - a[0]
+        py = coords[1][None, box[1], None] - a[1]
+        pz = coords[2][None, None, box[2]] - a[2]
+
+        # Distance of the voxel centers to the segment
+        d = b - a
+        length2 = d @ d
+        t = (px * d[0] + py * d[1] + pz * d[2]) / length2 if length2 > 0 \
+            else np.zeros(1)
+        t = np.clip(t, 0, 1)
+        dist2 = (px - t * d[0])**2 + (py - t * d[1])**2 + (pz - t * d[2])**2
+        sub = volume[tuple(box)]
+        sub[dist2 <= r**2] = c
+    return volume
+
+
+def compute_DeltaB_fft(chi, voxel_size=(1., 1., 1.), B0_dir=(0., 0., 1.),
+                       pad=0):
+    """Field offset of a susceptibility volume, in units of B0.
+
+    Parameters
+    ----------
+    chi : ndarray, shape (nx, ny, nz)
+    voxel_size : tuple of 3 floats
+    B0_dir : tuple of 3 floats
+        Direction of the main magnetic field.
+    pad : int
+        Zero padding added on both sides of every axis to reduce wrap around
+        from the periodic convolution.
+    """
+    chi = np.asarray(chi, dtype=float)
+    if pad > 0:
+        chi = np.pad(chi, pad)
+    kernel = dipole_kernel(chi.shape, tuple(float(v) for v in voxel_size),
+                           tuple(float(v) for v in B0_dir))
+    field = np.fft.irfftn(np.fft.rfftn(chi) * kernel, s=chi.shape)
+    if pad > 0:
+        field = field[pad:-pad, pad:-pad, pad:-pad]
+    return field
@@ -0,0 +1,257 @@
+"""Event loop helpers for the interactive scripts."""
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+from matplotlib.backend_bases import TimerBase
+from fmrilib.models import MODELS
+
+
+def _can_fork():
+    """Whether a worker can be forked from the GUI process.
+
+    Worker processes are forked, so that the (unguarded) scripts are not
+    imported again in the child. Forking is only safe on Linux (not with
+    the macOS GUI frameworks) and only from a single threaded process.
+    Otherwise models run on the GUI thread.
+    """
+    return sys.platform.startswith("linux") and threading.active_count() == 1
+
+
+# =============================================================================
+class UpdateScheduler:
+    """Run a slider callback at most once per frame with the latest values.
+
+    Slider events only mark an update as pending and start a single shot
+    timer of the canvas. When it fires, the current slider values are read
+    (latest wins) and the callback runs once, unless the values are the
+    same as in the previous run. Events caused by programmatic set_val
+    inside `suppressed()` are ignored.
+
+    Parameters
+    ----------
+    figure : matplotlib.figure.Figure
+        Figure whose canvas provides the timer.
+    callback : callable
+        Called as callback(**params).
+    sliders : dict
+        Parameter name -> widget with a `val` and `on_changed`.
+    interval : int
+        Minimum time between updates [ms].
+    """
+
+    def __init__(self, figure, callback, sliders, interval=16):
+        self.callback = callback
+        self.sliders = sliders
+        self._pending = False
+        self._suppress = 0
+        self._last = self.params()
+        self._timer = figure.canvas.new_timer(interval=interval)
+        self._timer.single_shot = True
+        self._timer.add_callback(self.flush)
+        # Backends without an event loop (e.g. Agg) have timers that never
+        # fire, updates are then run right away
+        self._immediate = type(self._timer) is TimerBase
+        for slider in sliders.values():
+            slider.on_changed(self.request)
+
+    def params(self):
+        """Current slider values."""
+        return {name: slider.val for name, slider in self.sliders.items()}
+
+    def request(self, val=None):
+        """Slider callback: schedule an update."""
+        if self._suppress:
+            return
+        if self._immediate:
+            self.flush()
+        elif not self._pending:
+            self._pending = True
+            self._timer.start()
+
+    def flush(self, force=False):
+        """Run the callback now if the parameters changed."""
+        self._pending = False
+        params = self.params()
+        if params == self._last and not force:
+            return
+        self._last = params
+        with self.suppressed():
+            self.callback(**params)
+
+    @contextmanager
+    def suppressed(self):
+        """Ignore slider events, e.g. of set_val in the callback."""
+        self._suppress += 1
+        try:
+            yield
+        finally:
+            self._suppress -= 1
+
+
+# =============================================================================
+def _block_name(pid, generation, index):
+    return "fmrilib_{}_{}_{}".format(pid, generation, index)
+
+
+def _worker(model, requests, results):
+    """Worker process loop: run models and return arrays in shared memory."""
+    while True:
+        request = requests.get()
+        if request is None:
+            return
+        generation, params = request
+        blocks = {}
+        for i, (name, value) in enumerate(MODELS[model](**params).items()):
+            value = np.ascontiguousarray(value)
+            shm = SharedMemory(_block_name(os.getpid(), generation, i),
+                               create=True, size=max(value.nbytes, 1))
+            # Owned by the parent from now on, which unlinks it after reading
+            resource_tracker.unregister(shm._name, "shared_memory")
+            np.ndarray(value.shape, value.dtype, buffer=shm.buf)[...] = value
+            shm.close()
+            blocks[name] = (shm.name, value.shape, value.dtype.str)
+        results.put((generation, blocks))
+
+
+def _read_blocks(blocks):
+    """Copy arrays out of shared memory blocks and unlink the blocks."""
+    results = {}
+    for name, (block, shape, dtype) in blocks.items():
+        shm = SharedMemory(block)
+        results[name] = np.ndarray(shape, dtype, buffer=shm.buf).copy()
+        shm.close()
+        shm.unlink()
+    return results
+
+
+def _unlink_orphans(pid, generation):
+    """Unlink the blocks a terminated worker created for a request."""
+    index = 0
+    while True:
+        try:
+            shm = SharedMemory(_block_name(pid, generation, index))
+        except FileNotFoundError:
+            return
+        shm.close()
+        shm.unlink()
+        index += 1
+
+
+class BackgroundCompute:
+    """Run a model in a worker process and keep only the latest request.
+
+    `submit` never blocks the event loop. The worker returns the result
+    arrays in shared memory blocks, which a canvas timer polls for and
+    hands to `callback(results, params)` on the GUI thread. A running
+    request is allowed to finish and its result is shown even when newer
+    requests arrived meanwhile, so slow models keep updating during a
+    drag. Only the newest of the queued requests runs next. A superseded
+    request that is still running after `patience` seconds is cancelled by
+    restarting the worker process. Where a worker cannot be forked safely
+    (see `_can_fork`), models run synchronously on the GUI thread.
+
+    Parameters
+    ----------
+    figure : matplotlib.figure.Figure
+        Figure whose canvas provides the timer. The worker stops when the
+        figure is closed.
+    model : str
+        Key of fmrilib.models.MODELS.
+    callback : callable
+        Called as callback(results, params) with the model results.
+    poll : int
+        Polling interval while a request is in flight [ms].
+    patience : float
+        Time a superseded request may keep running before the worker is
+        restarted [s].
+    """
+
+    def __init__(self, figure, model, callback, poll=20, patience=5.):
+        self.model = model
+        self.callback = callback
+        self.patience = patience
+        self._generation = 0
+        self._pending = None
+        self._running = None
+        self._process = None
+        self._timer = figure.canvas.new_timer(interval=poll)
+        self._timer.add_callback(self._poll)
+        # Without an event loop (e.g. Agg) the timer never fires
+        self._immediate = type(self._timer) is TimerBase or not _can_fork()
+        figure.canvas.mpl_connect("close_event", lambda event: self.close())
+
+    def submit(self, **params):
+        """Request the model for these parameters, superseding older ones."""
+        self._generation += 1
+        if self._immediate:
+            self.callback(MODELS[self.model](**params), params)
+            return
+        self._pending = (self._generation, params)
+        self._dispatch()
+        self._timer.start()
+
+    def close(self):
+        """Stop the worker process."""
+        self._timer.stop()
+        if self._process is not None:
+            self._cancel()
+
+    def _start(self):
+        ctx = multiprocessing.get_context("fork")
+        self._requests = ctx.SimpleQueue()
+        self._results = ctx.SimpleQueue()
+        self._process = ctx.Process(
+            target=_worker, args=(self.model, self._requests, self._results),
+            daemon=True)
+        self._process.start()
+
+    def _dispatch(self):
+        if self._running is not None or self._pending is None:
+            return
+        if self._process is None:
+            if not _can_fork():
+                # E.g. a thread was started since, run on the GUI thread
+                self._immediate = True
+                generation, params = self._pending
+                self._pending = None
+                self.callback(MODELS[self.model](**params), params)
+                return
+            self._start()
+        self._requests.put(self._pending)
+        self._running = self._pending + (time.perf_counter(),)
+        self._pending = None
+
+    def _cancel(self):
+        """Terminate the worker, freeing whatever it has produced."""
+        self._process.terminate()
+        self._process.join()
+        # At most one request is in flight, so all blocks (sent or not)
+        # belong to it. The queues may be corrupt and are not reused.
+        if self._running is not None:
+            _unlink_orphans(self._process.pid, self._running[0])
+        self._process = None
+        self._running = None
+
+    def _poll(self):
+        while self._running is not None and not self._results.empty():
+            generation, blocks = self._results.get()
+            params = self._running[1]
+            self._running = None
+            # Requests run one at a time, so this is the newest result yet
+            self.callback(_read_blocks(blocks), params)
+
+        if self._running is not None and not self._process.is_alive():
+            # The worker crashed (e.g. bad parameters), drop the request
+            self._cancel()
+        elif (self._running is not None and self._pending is not None
+                and time.perf_counter() - self._running[2] > self.patience):
+            self._cancel()
+        self._dispatch()
+        if self._running is None:
+            self._timer.stop()
@@ -0,0 +1,90 @@
+"""Headless entry points of the simulations, keyed by model name.
+
+Every model is a function of keyword parameters (defaults as in the
+interactive scripts) that returns a dict of NumPy arrays. Only compute
+modules are imported here, never matplotlib.
+"""
+import numpy as np
+from fmrilib.t2star import relaxation_T2star, relaxation_T2star_Uludag2009
+from fmrilib.complex_noise import generate_complex_data
+from fmrilib.complex_stats import magnitude_phase
+from fmrilib.boxerman import compute_DeltaBvessel
+from fmrilib.two_component import simulate_two_component
+from fmrilib.vaso import (compute_SS_SI_VASO_Mz_signal,
+                          compute_SS_SI_VASO_time_grid)
+from fmrilib.turner2002 import turner2022_eq4
+
+
+# =============================================================================
+def t2star(S0=100., T2star=28., max_time=100., nr_points=101):
+    """T2* decay (01_t2starsim_v1.py)."""
+    time = np.linspace(0, max_time, int(nr_points))
+    return {"time": time, "signal": relaxation_T2star(time, S0, T2star)}
+
+
+def uludag2009(S0=100., T2star_in=22.3, T2star_ex=25.1, CBV=0.05,
+               max_time=100., nr_points=101):
+    """Intra and extravascular T2* decay (02_t2starsim_v2.py)."""
+    time = np.linspace(0, max_time, int(nr_points))
+    signal = relaxation_T2star_Uludag2009(time, S0, T2star_in, T2star_ex, CBV)
+    return {"time": time, "signal": signal}
+
+
+def complex_noise(nr_samples=1000, mean_x=100., mean_y=100., std=20.,
+                  seed=0):
+    """Complex Gaussian noise samples (03_generate_complex_numbers.py)."""
+    data = generate_complex_data(int(nr_samples), mean_x, mean_y, std, seed)
+    magnitude, phase = magnitude_phase(data)
+    return {"data": data, "magnitude": magnitude, "phase": phase}
+
+
+def boxerman1995(S=100., theta_deg=90., R=5., extent=10., nr_points=101):
+    """Vessel Delta B map (04_boxerman1995_interactive.py)."""
+    return {"DeltaB": compute_DeltaBvessel(S, theta_deg, R, extent,
+                                           int(nr_points))}
+
+
+def two_component(mag_iv=50., deg_offset=45., mag_ex=50., delta_deg=30.,
+                  radius=20.):
+    """Two component vector sum (wip/05_two_component_model.py)."""
+    results = simulate_two_component(mag_iv, deg_offset, mag_ex, delta_deg,
+                                     radius=radius, dtype=np.float64)
+    return {k: v.ravel() for k, v in results.items()}
+
+
+def vaso(T1=1.9, T1_ref=2.1, Tr=2., Ti1=1.45561, Ti2=1.7, max_time=10.,
+         nr_points=401):
+    """SS-SI-VASO Mz (wip/99_plot_Mz_SS_SI_VASO_interactive.py)."""
+    time = compute_SS_SI_VASO_time_grid(max_time, (T1, T1_ref), Tr, Ti1, Ti2,
+                                        nr_points=int(nr_points))
+    tissue = compute_SS_SI_VASO_Mz_signal(time, T1, Tr, Ti1, Ti2,
+                                          mode_nonblood=True)
+    blood = compute_SS_SI_VASO_Mz_signal(time, T1_ref, Tr, Ti1, Ti2,
+                                         mode_nonblood=False)
+    return {"time": time, "tissue": tissue, "blood": blood}
+
+
+def turner2002(beta=0.02, d_c=5., l_c=200., d_v=0.6, t=3.):
+    """Drained cortical area (wip/99_turner2002.py)."""
+    return {"area": np.asarray(turner2022_eq4(beta, d_c, l_c, d_v, t))}
+
+
+MODELS = {
+    "t2star": t2star,
+    "uludag2009": uludag2009,
+    "complex_noise": complex_noise,
+    "boxerman1995": boxerman1995,
+    "two_component": two_component,
+    "vaso": vaso,
+    "turner2002": turner2002,
+}
+
+# Compute modules whose import must not pull in a GUI stack
+COMPUTE_MODULES = (
+    "fmrilib.t2star", "fmrilib.t2star_fit", "fmrilib.boxerman",
+    "fmrilib.dipole", "fmrilib.diffusion", "fmrilib.dephasing",
+    "fmrilib.complex_noise", "fmrilib.complex_stats", "fmrilib.rician",
+    "fmrilib.snr_sweep", "fmrilib.noise_floor", "fmrilib.two_component",
+    "fmrilib.phase_regression", "fmrilib.ring_buffer", "fmrilib.vaso",
+    "fmrilib.turner2002", "fmrilib.models",
+)
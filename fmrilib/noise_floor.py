@@ -0,0 +1,106 @@
+"""Rician noise floor estimation and magnitude bias correction.
+
+Works on (memory-mapped) arrays of any shape one slab of the first axis at
+a time, so arbitrarily large 4D series are processed in bounded memory.
+Complex inputs are converted to magnitude with np.abs, the magnitude
+convention of fmrilib.complex_stats.magnitude_phase (the phase is not
+needed here and not computed).
+
+References
+----------
+- Gudbjartsson, H., Patz, S., 1995. The rician distribution of noisy mri
+data. Magnetic Resonance in Medicine 34, 910–914.
+https://doi.org/10.1002/mrm.1910340618
+
+"""
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+
+# =============================================================================
+def _magnitude(slab):
+    """Magnitude of a slab as a new float64 array."""
+    if np.iscomplexobj(slab):
+        return np.abs(slab).astype(float, copy=False)
+    return np.array(slab, dtype=float)
+
+
+def _slabs(n, slab_size):
+    slab_size = max(int(slab_size), 1)
+    return [slice(i, min(i + slab_size, n)) for i in range(0, n, slab_size)]
+
+
+def estimate_sigma(data, mask, slab_size=8):
+    """Noise standard deviation from background (signal free) voxels.
+
+    In the background the magnitude is Rayleigh distributed with
+    E[M^2] = 2 sigma^2, which gives the maximum likelihood estimate
+    sigma = sqrt(mean(M^2) / 2).
+
+    Parameters
+    ----------
+    data : array_like, e.g. np.memmap of shape (x, y, z, t)
+        Magnitude or complex data.
+    mask : array_like of bool
+        Background voxels. Its shape is a leading part of data.shape (e.g.
+        (x, y, z)) and it is applied to all remaining axes. ValueError is
+        raised if it selects no voxels.
+    slab_size : int
+        Number of planes along the first axis read at once.
+    """
+    mask = np.asarray(mask, dtype=bool)
+    if not mask.any():
+        raise ValueError("mask selects no voxels")
+    total = 0.
+    count = 0
+    for s in _slabs(data.shape[0], slab_size):
+        values = _magnitude(data[s])[mask[s]]
+        total += np.sum(values**2)
+        count += values.size
+    return np.sqrt(total / (2 * count))
+
+
+def correct_rician_bias(data, sigma, out=None, dtype=np.float32, slab_size=8,
+                        nr_threads=1):
+    """Bias corrected magnitude sqrt(max(M^2 - sigma^2, 0)).
+
+    Negative values of M^2 - sigma^2 (pure noise) are set to zero.
+
+    Parameters
+    ----------
+    data : array_like, e.g. np.memmap
+        Magnitude or complex data.
+    sigma : float
+        Noise standard deviation, e.g. from estimate_sigma.
+    out : ndarray, np.memmap or str, optional
+        Output array of data.shape, or a file name for a new np.memmap.
+    dtype : numpy dtype
+        Dtype of a newly created output.
+    slab_size : int
+        Number of planes along the first axis processed at once.
+    nr_threads : int
+        Slabs are processed by a thread pool when larger than 1.
+    """
+    if out is None:
+        out = np.empty(data.shape, dtype=dtype)
+    elif isinstance(out, str):
+        out = np.lib.format.open_memmap(out, mode='w+', dtype=dtype,
+                                        shape=data.shape)
+    sigma2 = float(sigma)**2
+
+    def correct(s):
+        M2 = np.square(_magnitude(data[s]))
+        M2 -= sigma2
+        np.maximum(M2, 0, out=M2)
+        out[s] = np.sqrt(M2, out=M2)
+
+    slabs = _slabs(data.shape[0], slab_size)
+    if nr_threads > 1:
+        with ThreadPoolExecutor(max_workers=nr_threads) as executor:
+            list(executor.map(correct, slabs))
+    else:
+        for s in slabs:
+            correct(s)
+    if isinstance(out, np.memmap):
+        out.flush()
+    return out
@@ -0,0 +1,104 @@
+"""Temporal phase unwrapping and phase regression of (voxel, time) series.
+
+Phase time series wrapped to [0, 2 pi) (or [0, 360) degrees) are unwrapped
+along time, then the phase correlated part of the magnitude is removed per
+voxel with a least squares fit of magnitude on phase. Large draining veins
+produce magnitude changes that are coupled to phase changes, so the
+regression suppresses them.
+
+References
+----------
+- Menon, R.S., 2002. Postacquisition suppression of large-vessel BOLD
+signals in high-resolution fMRI. Magnetic Resonance in Medicine 47, 1–9.
+https://doi.org/10.1002/mrm.10041
+
+- Vu, A.T., Gallant, J.L., 2015. Using a novel source-localized phase
+regressor technique for evaluation of the vascular contribution to semantic
+category area localization in BOLD fMRI. Frontiers in Neuroscience 9.
+https://doi.org/10.3389/fnins.2015.00411
+
+"""
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+
+# =============================================================================
+def unwrap_phase(phase, degrees=False):
+    """Unwrap phase along the last (time) axis."""
+    period = 360. if degrees else 2*np.pi
+    return np.unwrap(phase, axis=-1, period=period)
+
+
+def regress_phase(magnitude, phase):
+    """Remove the phase correlated component from magnitude.
+
+    Per voxel magnitude = mean + slope * (phase - mean(phase)) + residual,
+    the returned magnitude is mean + residual.
+
+    Parameters
+    ----------
+    magnitude, phase : ndarray, shape (n_voxels, n_time)
+        Phase should be unwrapped.
+
+    Returns
+    -------
+    corrected : ndarray, shape (n_voxels, n_time)
+    slope : ndarray, shape (n_voxels,)
+    """
+    magnitude = np.asarray(magnitude, dtype=float)
+    phase = np.array(phase, dtype=float)
+    phase -= phase.mean(axis=-1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = np.einsum('ij,ij->i', phase, magnitude) \
+            / np.einsum('ij,ij->i', phase, phase)
+    slope = np.nan_to_num(slope)  # Constant phase, nothing to regress
+    phase *= slope[:, None]
+    return magnitude - phase, slope
+
+
+def phase_regression(magnitude, phase, unwrap=True, degrees=False, out=None,
+                     chunk_size=8192, nr_threads=1):
+    """Unwrap and regress phase for all voxels, chunk by chunk.
+
+    Parameters
+    ----------
+    magnitude, phase : array_like, shape (n_voxels, n_time)
+        np.memmap inputs are read chunk by chunk.
+    unwrap : bool
+        Unwrap the phase along time first.
+    degrees : bool
+        Phase is given in degrees.
+    out : ndarray, optional
+        Output array for the corrected magnitude, e.g. a np.memmap.
+    chunk_size : int
+        Voxels per chunk.
+    nr_threads : int
+        Chunks are processed by a thread pool when larger than 1.
+
+    Returns
+    -------
+    corrected : ndarray, shape (n_voxels, n_time)
+    slope : ndarray, shape (n_voxels,)
+        Magnitude change per unit (unwrapped) phase.
+    """
+    nr_voxels = magnitude.shape[0]
+    if out is None:
+        out = np.empty(magnitude.shape)
+    slope = np.empty(nr_voxels)
+
+    def process(rows):
+        p = phase[rows]
+        if unwrap:
+            p = unwrap_phase(p, degrees=degrees)
+        out[rows], slope[rows] = regress_phase(magnitude[rows], p)
+
+    chunk_size = max(int(chunk_size), 1)
+    chunks = [slice(i, min(i + chunk_size, nr_voxels))
+              for i in range(0, nr_voxels, chunk_size)]
+    if nr_threads > 1:
+        with ThreadPoolExecutor(max_workers=nr_threads) as executor:
+            list(executor.map(process, chunks))
+    else:
+        for rows in chunks:
+            process(rows)
+    return out, slope
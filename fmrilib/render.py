@@ -0,0 +1,136 @@
+"""Headless batch rendering of the model figures over parameter grids.
+
+Frames are rendered with the Agg canvas (no window, no pyplot) in a process
+pool. Every worker builds the figure of a model once and afterwards only
+updates the data of its artists (see fmrilib.views), so a frame costs one
+model evaluation and one draw.
+"""
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+# Figure and view per (model, dpi), built once per worker process
+_FIGURES = {}
+
+
+# =============================================================================
+def parameter_grid(**grid):
+    """All combinations of the given parameter values, last varies fastest.
+
+    Scalars are kept fixed, sequences are swept.
+    """
+    names = list(grid)
+    values = [np.atleast_1d(grid[k]).tolist() for k in names]
+    return [dict(zip(names, combination))
+            for combination in itertools.product(*values)]
+
+
+def _figure(model, dpi):
+    if (model, dpi) not in _FIGURES:
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from fmrilib.views import FIGURES
+        fig = Figure(dpi=dpi)
+        FigureCanvasAgg(fig)
+        _FIGURES[model, dpi] = fig, FIGURES[model](fig)
+    return _FIGURES[model, dpi]
+
+
+def _render_chunk(args):
+    """Render frames with the figure of this process.
+
+    Returns the frames decimated by `stride` when a contact sheet is made.
+    """
+    from matplotlib.image import imsave
+    from fmrilib.views import model_defaults
+    model, frames, dpi, stride = args
+    fig, view = _figure(model, dpi)
+    tiles = []
+    for params, path in frames:
+        # Every frame starts from the defaults, nothing carries over
+        view.params = model_defaults(model)
+        view.update(**params)
+        fig.canvas.draw()
+        rgba = np.asarray(fig.canvas.buffer_rgba())
+        if path is not None:
+            imsave(path, rgba)
+        if stride:
+            tiles.append(rgba[::stride, ::stride].copy())
+    return tiles
+
+
+def contact_sheet(tiles, nr_columns, pad=4):
+    """Tile equally sized RGBA frames row by row on a white background."""
+    height, width = tiles[0].shape[:2]
+    nr_rows = -(-len(tiles) // nr_columns)
+    sheet = np.full((nr_rows * (height + pad) + pad,
+                     nr_columns * (width + pad) + pad, 4), 255, np.uint8)
+    for i, tile in enumerate(tiles):
+        y = pad + (i // nr_columns) * (height + pad)
+        x = pad + (i % nr_columns) * (width + pad)
+        sheet[y:y + height, x:x + width] = tile
+    return sheet
+
+
+def render_grid(model, grid, out_dir=None, sheet=None, nr_columns=None,
+                stride=4, dpi=100, nr_workers=1, chunk_size=None):
+    """Render the figure of a model for every point of a parameter grid.
+
+    Parameters
+    ----------
+    model : str
+        Key of fmrilib.views.FIGURES (same as fmrilib.models.MODELS).
+    grid : dict or list of dict
+        Parameter values as for `parameter_grid`, or explicit frames.
+        Missing parameters keep the model defaults.
+    out_dir : str, optional
+        Directory for one PNG per frame, named <model>_<index>.png in grid
+        order.
+    sheet : str, optional
+        File name of a contact sheet with all frames.
+    nr_columns : int, optional
+        Columns of the contact sheet. Defaults to the number of values of
+        the last grid parameter.
+    stride : int
+        Pixel decimation of the frames in the contact sheet.
+    dpi : float
+        Resolution of the frames.
+    nr_workers : int
+        Worker processes. Frames are split in contiguous chunks and every
+        worker reuses one figure for all of its chunks.
+    chunk_size : int, optional
+        Frames per task, by default about four tasks per worker.
+
+    Returns
+    -------
+    paths : list of str
+        The written PNG files (empty without out_dir).
+    """
+    frames = parameter_grid(**grid) if isinstance(grid, dict) else list(grid)
+    if out_dir is not None:
+        os.makedirs(out_dir, exist_ok=True)
+        paths = [os.path.join(out_dir, "{}_{:04d}.png".format(model, i))
+                 for i in range(len(frames))]
+    else:
+        paths = [None] * len(frames)
+    if chunk_size is None:
+        chunk_size = max(1, -(-len(frames) // (4 * nr_workers)))
+    jobs = [(model, list(zip(frames[i:i + chunk_size],
+                             paths[i:i + chunk_size])),
+             dpi, stride if sheet else 0)
+            for i in range(0, len(frames), chunk_size)]
+
+    if nr_workers > 1:
+        with ProcessPoolExecutor(nr_workers) as pool:
+            tiles = list(pool.map(_render_chunk, jobs))
+    else:
+        tiles = [_render_chunk(job) for job in jobs]
+
+    if sheet:
+        from matplotlib.image import imsave
+        if nr_columns is None:
+            nr_columns = (np.size(list(grid.values())[-1])
+                          if isinstance(grid, dict) and grid else len(frames))
+        imsave(sheet, contact_sheet(sum(tiles, []), nr_columns))
+    return [p for p in paths if p is not None]
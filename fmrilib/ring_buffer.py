@@ -0,0 +1,32 @@
+"""Fixed length multi-channel history for live time series plots."""
+import numpy as np
+
+
+# =============================================================================
+class RingBuffer:
+    """Fixed length history of several channels.
+
+    Every sample is written twice, at i and i + length, so the history in
+    time order is always a contiguous slice of the storage. Appending is
+    O(1) and ordered views do not copy.
+    """
+
+    def __init__(self, nr_channels, length, fill=0.):
+        self.length = length
+        self._data = np.empty((nr_channels, 2 * length))
+        self._data[:] = np.reshape(fill, (-1, 1))
+        self._head = 0
+
+    def append(self, values):
+        """Overwrite the oldest sample of each channel."""
+        self._data[:, self._head] = values
+        self._data[:, self._head + self.length] = values
+        self._head = (self._head + 1) % self.length
+
+    def view(self, channel=None):
+        """Read-only view of the history, oldest sample first."""
+        view = self._data[:, self._head:self._head + self.length]
+        if channel is not None:
+            view = view[channel]
+        view.flags.writeable = False
+        return view
@@ -0,0 +1,103 @@
+"""Sequential Monte Carlo sweep of magnitude and phase statistics over SNR.
+
+Reproduces the kind of curves of Gudbjartsson 1995 Fig. 1-2. All SNR levels
+are sampled together in batches. Each level keeps being sampled until the
+standard errors of its mean magnitude and magnitude standard deviation are
+small relative to its mean magnitude, and the standard error of its phase
+standard deviation is below an absolute tolerance, then it is retired from
+the batch. Both criteria get easier with SNR (the mean magnitude grows, the
+phase spread shrinks), so low SNR levels get more samples than high SNR
+levels.
+"""
+import numpy as np
+
+
+# =============================================================================
+def _moments(n, shift, S):
+    """Mean, sample std and their standard errors from shifted power sums."""
+    a = S[1] / n
+    m2 = S[2] / n - a**2
+    m4 = S[4] / n - 4*a*S[3] / n + 6*a**2*S[2] / n - 3*a**4
+    m2 = np.maximum(m2, 0)
+    std = np.sqrt(m2 * n / np.maximum(n - 1, 1))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        std_se = np.sqrt(np.maximum(m4 - m2**2, 0) / (4 * n * m2))
+    return shift + a, std / np.sqrt(n), std, np.nan_to_num(std_se)
+
+
+def sweep_snr(mean_x, mean_y, std, tol=1e-3, tol_phase=None,
+              batch_size=10**4, min_samples=2*10**4, max_samples=10**7,
+              seed=0):
+    """Sample complex Gaussian noise until the statistics converge.
+
+    Parameters
+    ----------
+    mean_x, mean_y, std : array_like
+        Noise free real and imaginary parts and noise standard deviation,
+        broadcast against each other. Each element is one SNR level.
+    tol : float
+        Tolerance of the standard errors of the magnitude mean and standard
+        deviation, relative to the estimated mean magnitude.
+    tol_phase : float
+        Tolerance of the standard error of the phase standard deviation in
+        radians, tol when None. At low SNR the phase is close to uniform,
+        so this criterion usually sets the number of samples there.
+    batch_size : int
+        Samples drawn per active level and iteration.
+    min_samples, max_samples : int
+        Levels are never retired before min_samples and always after
+        max_samples.
+    seed : int
+
+    Returns
+    -------
+    table : dict of ndarray
+        Per level: mean_x, mean_y, std, snr, nr_samples, mag_mean,
+        mag_mean_se, mag_std, mag_std_se, pha_std, pha_std_se (radians,
+        phase relative to the noise free phase) and converged.
+    """
+    mean_x, mean_y, std = [
+        a.ravel().astype(float) for a in np.broadcast_arrays(
+            np.asarray(mean_x), np.asarray(mean_y), np.asarray(std))]
+    tol_phase = tol if tol_phase is None else tol_phase
+    nr_levels = mean_x.size
+    rng = np.random.default_rng(seed)
+    mean = mean_x + 1j * mean_y
+    rotation = np.ones(nr_levels, dtype=complex)
+    np.divide(np.conj(mean), np.abs(mean), out=rotation, where=mean != 0)
+
+    # Power sums are shifted by the noise free magnitude and phase
+    n = np.zeros(nr_levels)
+    shift = np.stack((np.abs(mean), np.zeros(nr_levels)))
+    S = np.zeros((2, 5, nr_levels))
+    converged = np.zeros(nr_levels, dtype=bool)
+    active = np.arange(nr_levels)
+
+    while active.size > 0:
+        noise = rng.standard_normal((2, active.size, batch_size))
+        data = (mean[active, None] + std[active, None]
+                * (noise[0] + 1j * noise[1]))
+        values = np.stack((np.abs(data),
+                           np.angle(data * rotation[active, None])))
+        x = values - shift[:, active, None]
+        for k in range(1, 5):
+            S[:, k, active] += (x**k).sum(axis=-1)
+        n[active] += batch_size
+
+        # Retire converged levels and levels that used up their budget
+        mag = _moments(n[active], shift[0, active], S[0, :, active].T)
+        pha = _moments(n[active], shift[1, active], S[1, :, active].T)
+        # <= so that noise free levels (std=0, all SEs 0) converge
+        done = ((mag[1] <= tol * mag[0]) & (mag[3] <= tol * mag[0])
+                & (pha[3] <= tol_phase))
+        converged[active] = done & (n[active] >= min_samples)
+        active = active[~converged[active] & (n[active] < max_samples)]
+
+    mag = _moments(n, shift[0], S[0])
+    pha = _moments(n, shift[1], S[1])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        snr = np.abs(mean) / std
+    return {"mean_x": mean_x, "mean_y": mean_y, "std": std, "snr": snr,
+            "nr_samples": n.astype(np.int64), "mag_mean": mag[0],
+            "mag_mean_se": mag[1], "mag_std": mag[2], "mag_std_se": mag[3],
+            "pha_std": pha[2], "pha_std_se": pha[3], "converged": converged}
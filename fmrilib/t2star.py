@@ -0,0 +1,115 @@
+"""T2* relaxation models.
+
+References
+----------
+- Uludag, K., Müller-Bierl, B., Ugurbil, K., 2009. An integrative model for
+neuronal activity-induced signal changes for gradient and spin echo functional
+imaging. NeuroImage 48, 150–165.
+https://doi.org/10.1016/j.neuroimage.2009.05.051
+
+"""
+import numpy as np
+
+
+# =============================================================================
+def relaxation_T2star(time, S0=100, T2star=28):
+    return S0 * np.exp(-time/T2star)
+
+
+def relaxation_T2star_multicompartment(time, T2star, fractions, S0=100,
+                                       dtype=np.float64, chunk_size=65536):
+    """Signal of K compartments with their own T2* and volume fraction.
+
+    S(t) = S0 * sum_k fractions_k * exp(-t / T2star_k)
+
+    The compartment axis is the last axis of T2star and fractions, all other
+    axes are batch axes (e.g. voxels or parameter sets) and broadcast with S0.
+    When T2star is shared by the whole batch (shape (K,)) the signal is a
+    single (n_batch, K) @ (K, n_time) matrix product. Otherwise per batch
+    element decays are computed for at most chunk_size elements at a time.
+
+    Parameters
+    ----------
+    time : array_like, shape (n_time,) or scalar
+    T2star : array_like, shape (..., K)
+    fractions : array_like, shape (..., K)
+    S0 : array_like, broadcastable to the batch shape
+    dtype : numpy dtype
+        Use np.float32 to halve memory and speed up large batches.
+    chunk_size : int
+        Number of batch elements evaluated at once.
+
+    Returns
+    -------
+    signal : ndarray, shape (..., n_time)
+    """
+    time = np.asarray(time, dtype=dtype)
+    time_shape = time.shape
+    time = time.ravel()
+    R2star = 1 / np.asarray(T2star, dtype=dtype)
+    fractions = np.asarray(fractions, dtype=dtype)
+    S0 = np.asarray(S0, dtype=dtype)
+
+    K = np.broadcast_shapes(R2star.shape, fractions.shape)[-1:]
+    batch = np.broadcast_shapes(R2star.shape[:-1], fractions.shape[:-1],
+                                S0.shape)
+    weights = np.broadcast_to(fractions, batch + K).reshape(-1, K[0])
+    weights = weights * np.broadcast_to(S0, batch).reshape(-1, 1)
+
+    if R2star.ndim <= 1:
+        decay = np.exp(-np.multiply.outer(np.broadcast_to(R2star, K), time))
+        signal = weights @ decay
+    else:
+        R2star = np.broadcast_to(R2star, batch + K).reshape(-1, K[0])
+        signal = np.empty((weights.shape[0], time.size), dtype=dtype)
+        chunk_size = max(int(chunk_size), 1)
+        for i in range(0, weights.shape[0], chunk_size):
+            j = i + chunk_size
+            decay = np.exp(-R2star[i:j, :, None] * time)
+            signal[i:j] = np.matmul(weights[i:j, None, :], decay)[:, 0, :]
+    return signal.reshape(batch + time_shape)
+
+
+def relaxation_T2star_Uludag2009(time, S0=100, T2star_in=22.3, T2star_ex=25.1,
+                                 CBV=0.01, dtype=np.float64):
+    """Intravascular and extravascular compartments (Uludag 2009 Eq. 1)."""
+    T2star = np.stack(np.broadcast_arrays(T2star_ex, T2star_in), axis=-1)
+    CBV = np.asarray(CBV)
+    fractions = np.stack((1 - CBV, CBV), axis=-1)
+    return relaxation_T2star_multicompartment(time, T2star, fractions, S0=S0,
+                                              dtype=dtype)
+
+
+def required_T2star_change(TE, T2star, PSC):
+    """T2* change that gives a percent signal change at echo time TE.
+
+    Inverts relaxation_T2star: exp(-TE / T2star_new) = (1 + PSC / 100) *
+    exp(-TE / T2star), independent of S0. TE, T2star and PSC broadcast
+    against each other. NaN where no finite T2* can produce the change.
+    """
+    TE, T2star, PSC = [np.asarray(p, dtype=float) for p in (TE, T2star, PSC)]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        R2star_new = 1 / T2star - np.log1p(PSC / 100) / TE
+        T2star_new = np.where(R2star_new > 0, 1 / R2star_new, np.nan)
+    return T2star_new - T2star
+
+
+def required_T2star_in_change_Uludag2009(TE, PSC, T2star_in=22.3,
+                                         T2star_ex=25.1, CBV=0.01):
+    """Intravascular T2* change that gives a percent signal change at TE.
+
+    Inverts relaxation_T2star_Uludag2009 with the extravascular T2* and CBV
+    fixed. The signal is linear in exp(-TE / T2star_in), so the new
+    intravascular decay follows in closed form for the whole broadcast grid.
+    NaN where the change cannot be reached by the intravascular compartment.
+    """
+    TE, PSC, T2star_in, T2star_ex, CBV = [
+        np.asarray(p, dtype=float)
+        for p in (TE, PSC, T2star_in, T2star_ex, CBV)]
+    decay_ex = (1 - CBV) * np.exp(-TE / T2star_ex)
+    decay = decay_ex + CBV * np.exp(-TE / T2star_in)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        decay_in_new = ((1 + PSC / 100) * decay - decay_ex) / CBV
+        valid = (decay_in_new > 0) & (decay_in_new < 1)
+        T2star_in_new = np.where(valid, -TE / np.log(decay_in_new), np.nan)
+    return T2star_in_new - T2star_in
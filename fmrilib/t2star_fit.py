@@ -0,0 +1,152 @@
+"""Voxelwise S0 and T2* fitting of multi-echo data.
+
+The forward model is relaxation_T2star, S(TE) = S0 * exp(-TE / T2star),
+fitted for every voxel at once. A weighted log-linear fit gives a closed
+form estimate which can be refined with Gauss-Newton iterations on the
+non-linear least squares problem.
+"""
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+
+# =============================================================================
+def fit_T2star_loglinear(data, TE, weighted=True):
+    """Closed form weighted log-linear fit of S0 and R2* = 1 / T2*.
+
+    Parameters
+    ----------
+    data : ndarray, shape (n_voxels, n_echoes)
+    TE : array_like, shape (n_echoes,)
+    weighted : bool
+        Weight each echo by S^2, the inverse variance of log(S) for
+        Gaussian noise on S. Non positive samples get zero weight.
+
+    Returns
+    -------
+    S0, R2star : ndarray, shape (n_voxels,)
+    """
+    TE = np.asarray(TE, dtype=float)
+    data = np.asarray(data, dtype=float)
+    valid = data > 0
+    y = np.log(np.where(valid, data, 1.))
+    w = np.where(valid, data**2 if weighted else 1., 0.)
+
+    sw = w.sum(axis=-1)
+    sx = w @ TE
+    sxx = w @ TE**2
+    sy = (w * y).sum(axis=-1)
+    sxy = (w * y) @ TE
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        det = sw * sxx - sx**2
+        R2star = -(sw * sxy - sx * sy) / det
+        log_S0 = (sy + R2star * sx) / sw
+    return np.exp(log_S0), R2star
+
+
+def refine_T2star_gauss_newton(data, TE, S0, R2star, nr_iterations=5):
+    """Gauss-Newton refinement of S0 and R2* for all voxels at once.
+
+    Minimizes sum((data - S0 * exp(-TE * R2star))^2) per voxel. Each
+    iteration solves the 2x2 normal equations of every voxel in closed form.
+    """
+    TE = np.asarray(TE, dtype=float)
+    data = np.asarray(data, dtype=float)
+    S0 = np.array(S0, dtype=float)
+    R2star = np.array(R2star, dtype=float)
+    for _ in range(nr_iterations):
+        decay = np.exp(-R2star[:, None] * TE)
+        residual = data - S0[:, None] * decay
+
+        # Jacobian columns: d/dS0 and d/dR2star
+        j0 = decay
+        j1 = -S0[:, None] * TE * decay
+        a00 = (j0 * j0).sum(axis=-1)
+        a01 = (j0 * j1).sum(axis=-1)
+        a11 = (j1 * j1).sum(axis=-1)
+        b0 = (j0 * residual).sum(axis=-1)
+        b1 = (j1 * residual).sum(axis=-1)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            det = a00 * a11 - a01**2
+            step0 = (a11 * b0 - a01 * b1) / det
+            step1 = (a00 * b1 - a01 * b0) / det
+        ok = np.isfinite(step0) & np.isfinite(step1)
+        S0[ok] += step0[ok]
+        R2star[ok] += step1[ok]
+    return S0, R2star
+
+
+def _fit_chunk(args):
+    data, TE, weighted, nr_iterations = args
+    S0, R2star = fit_T2star_loglinear(data, TE, weighted=weighted)
+    if nr_iterations > 0:
+        S0, R2star = refine_T2star_gauss_newton(data, TE, S0, R2star,
+                                                nr_iterations=nr_iterations)
+    return S0, R2star
+
+
+def fit_T2star(data, TE, nr_iterations=0, weighted=True, chunk_size=65536,
+               nr_workers=1):
+    """Fit S0 and T2* for every voxel of a multi-echo dataset.
+
+    Parameters
+    ----------
+    data : array_like, shape (..., n_echoes)
+        For example a (x, y, z, echo) volume. np.memmap inputs are read
+        chunk by chunk.
+    TE : array_like, shape (n_echoes,)
+        Echo times, in the unit that T2* is returned in.
+    nr_iterations : int
+        Gauss-Newton iterations after the log-linear fit (0 to skip).
+    weighted : bool
+        Use the S^2 weighted log-linear fit.
+    chunk_size : int
+        Number of voxels fitted at once.
+    nr_workers : int
+        Number of processes. Chunks are slabs of consecutive voxels along the
+        first axis and are distributed over a process pool when larger than 1.
+
+    Returns
+    -------
+    S0, T2star : ndarray, shape data.shape[:-1]
+        T2* is inf where no decay is found, NaN where the fit is undefined.
+    """
+    TE = np.asarray(TE, dtype=float)
+    data = np.asanyarray(data)
+    shape = data.shape[:-1]
+    data = data.reshape(-1, data.shape[-1])
+    nr_voxels = data.shape[0]
+    chunk_size = max(int(chunk_size), 1)
+    starts = range(0, nr_voxels, chunk_size)
+    # Slabs are only read (and pickled) when they are submitted
+    chunks = ((data[i:i+chunk_size], TE, weighted, nr_iterations)
+              for i in starts)
+
+    S0 = np.empty(nr_voxels)
+    R2star = np.empty(nr_voxels)
+
+    def store(i, result):
+        S0[i:i+chunk_size], R2star[i:i+chunk_size] = result
+
+    if nr_workers > 1:
+        # At most 2 * nr_workers slabs in flight so memory stays bounded
+        with ProcessPoolExecutor(max_workers=nr_workers) as executor:
+            pending = deque()
+            for i, chunk in zip(starts, chunks):
+                pending.append((i, executor.submit(_fit_chunk, chunk)))
+                if len(pending) >= 2 * nr_workers:
+                    i, future = pending.popleft()
+                    store(i, future.result())
+            while pending:
+                i, future = pending.popleft()
+                store(i, future.result())
+    else:
+        for i, chunk in zip(starts, chunks):
+            store(i, _fit_chunk(chunk))
+
+    with np.errstate(divide='ignore'):
+        T2star = np.where(R2star > 0, 1 / R2star, np.inf)
+    T2star[np.isnan(R2star)] = np.nan
+    return S0.reshape(shape), T2star.reshape(shape)
@@ -0,0 +1,8 @@
+"""Area of activated cortex drained by a vein (Turner 2002)."""
+import numpy as np
+
+
+# =============================================================================
+def turner2022_eq4(beta, d_c, l_c, d_v, t):
+    """How much activated area a vein can drain?"""
+    return (np.pi / (4*beta*d_c)) * d_v**3 * l_c / t
@@ -0,0 +1,267 @@
+"""SS-SI-VASO (Slice Selective Slab Inversion Vascular Space 
+Occupancy) longitudinal magnetization (M_z) simulation.
+
+References
+---------
+- [Renzo Huber's PhD Thesis Fig. 3.2 Panel C Page 47.] Mapping Human Brain 
+Activity by Functional Magnetic Resonance Imaging of Blood Volume. 2014. Der 
+Fakultät für Physik und Geowissenschaften der Universität Leipzig eingereichte
+
+- [Also see] Huber, L., Ivanov, D., Krieger, S.N., Streicher, M.N., Mildner, 
+T., Poser, B.A., Möller, H.E., Turner, R., 2014. Slab-selective, BOLD-corrected
+VASO at 7 Tesla provides measures of cerebral blood volume reactivity with high
+signal-to-noise ratio. Magnetic Resonance in Medicine 72, 137–148.
+https://doi.org/10.1002/mrm.24916
+
+- [Might be useful to see as well] Akbari, A., Bollmann, S., Ali, T.S., 
+Barth, M., 2022. Modelling the depth-dependent VASO and BOLD responses in human
+primary visual cortex. Human Brain Mapping hbm.26094. 
+https://doi.org/10.1002/hbm.26094
+
+"""
+import numpy as np
+
+
+# =============================================================================
+def Mz(time, M0_equi, M0_init, FA_rad, T1):
+    """Longitudinal magnetization."""
+    return M0_equi - (M0_equi - M0_init * np.cos(FA_rad)) * np.exp(-time/T1)
+
+
+def compute_SS_SI_VASO_Mz_signal(time, T1, Tr, Ti1, Ti2, mode_nonblood=False):
+    """Compute VASO Mz signal.
+
+    Event driven: the samples are grouped into pulse segments (after the 180
+    degree pulse, after the first 90 degree pulse, after the second 90 degree
+    pulse), M0_init is updated once per segment and each segment is filled
+    with a single vectorized Mz evaluation.
+    """
+    time = np.asarray(time, dtype=float)
+    signal = np.zeros(time.shape)
+    if time.size == 0:
+        return signal
+    M0_equi = 1.  # This never changes
+    M0_init = 1.
+    FA_180 = np.deg2rad(180)
+    FA_90 = np.deg2rad(90)
+
+    # Prepare condition array
+    t_mod = time % (Tr*2)
+    cond = np.full(time.shape, 3)
+    cond[t_mod < (Ti2+Tr)] = 2  # Stages after 180 deg pulse
+    cond[t_mod < Ti1] = 1  # Stages after the first 90 deg pulse
+
+    # -------------------------------------------------------------------------
+    # Handle first signal separately
+    # -------------------------------------------------------------------------
+    signal[0] = Mz(time=t_mod[0], M0_equi=M0_equi, M0_init=M0_init,
+                   FA_rad=FA_180, T1=T1)
+
+    # -------------------------------------------------------------------------
+    # Segments of constant condition (one per pulse event)
+    # -------------------------------------------------------------------------
+    starts = np.flatnonzero(np.diff(cond[1:])) + 2
+    starts = np.concatenate(([1], starts))
+    stops = np.concatenate((starts[1:], [time.size]))
+    for i, j in zip(starts[starts < time.size], stops):
+        t = t_mod[i:j]
+        # After 180 degree pulse
+        if cond[i] == 1:
+            if mode_nonblood and cond[i] != cond[i-1]:
+                # Update M0 upon condition switch
+                M0_init = Mz(time=Tr-Ti2, M0_equi=M0_equi, M0_init=M0_init,
+                             FA_rad=FA_90, T1=T1)
+            signal[i:j] = Mz(time=t, M0_equi=M0_equi, M0_init=M0_init,
+                             FA_rad=FA_180, T1=T1)
+        # After the first 90 degree pulse
+        elif cond[i] == 2:
+            signal[i:j] = Mz(time=t-Ti1, M0_equi=M0_equi, M0_init=M0_init,
+                             FA_rad=FA_90, T1=T1)
+        # After the second 90 degree pulse
+        else:
+            signal[i:j] = Mz(time=t-Tr-Ti2, M0_equi=M0_equi, M0_init=M0_init,
+                             FA_rad=FA_90, T1=T1)
+    return signal
+
+
+def _SS_SI_VASO_Mz_kernel(time, T1, Tr, Ti1, Ti2, mode_nonblood):
+    """Vectorized VASO Mz signal for column vectors of parameters."""
+    M0_equi = 1.
+    cos_90 = np.cos(np.deg2rad(90))
+    cos_180 = np.cos(np.deg2rad(180))
+
+    # Prepare condition array
+    t_mod = time % (Tr*2)
+    cond = np.full(t_mod.shape, 3)
+    cond[t_mod < (Ti2+Tr)] = 2  # Stages after 180 deg pulse
+    cond[t_mod < Ti1] = 1  # Stages after the first 90 deg pulse
+
+    # Time since the last pulse and flip angle of that pulse
+    offset = np.where(cond == 1, 0., np.where(cond == 2, Ti1, Tr + Ti2))
+    cos_FA = np.where(cond == 1, cos_180, cos_90)
+    offset[:, 0] = 0.  # First signal is handled as after the 180 deg pulse
+    cos_FA[:, 0] = cos_180
+
+    # M0_init follows M_k = a + b * M_(k-1) at every switch into condition 1
+    M0_init = np.ones(t_mod.shape)
+    if mode_nonblood:
+        switch = np.zeros(t_mod.shape, dtype=int)
+        switch[:, 1:] = (cond[:, 1:] == 1) & (cond[:, :-1] != 1)
+        k = np.cumsum(switch, axis=1)
+        E = np.exp(-(Tr - Ti2) / T1)
+        a = M0_equi * (1 - E)
+        b = cos_90 * E
+        bk = b**k
+        M0_init = bk + a * (1 - bk) / (1 - b)
+
+    return (M0_equi
+            - (M0_equi - M0_init * cos_FA) * np.exp(-(t_mod - offset) / T1))
+
+
+def compute_SS_SI_VASO_Mz_signal_batch(time, T1, Tr, Ti1, Ti2,
+                                       mode_nonblood=False, chunk_size=1024):
+    """Compute VASO Mz signals for a grid of parameters.
+
+    T1, Tr, Ti1 and Ti2 are broadcast against each other and flattened into
+    n_params parameter sets. Each set gives the same trace as
+    compute_SS_SI_VASO_Mz_signal. At most chunk_size parameter sets are
+    evaluated at once to keep the temporary arrays bounded.
+
+    Returns
+    -------
+    signal : ndarray, shape (n_params, n_time)
+    """
+    time = np.asarray(time, dtype=float).ravel()
+    params = np.broadcast_arrays(*[np.asarray(p, dtype=float)
+                                   for p in (T1, Tr, Ti1, Ti2)])
+    T1, Tr, Ti1, Ti2 = [p.reshape(-1, 1) for p in params]
+    n_params = T1.shape[0]
+    chunk_size = max(int(chunk_size), 1)
+
+    signal = np.empty((n_params, time.size))
+    if time.size == 0:
+        return signal
+    for i in range(0, n_params, chunk_size):
+        j = i + chunk_size
+        signal[i:j] = _SS_SI_VASO_Mz_kernel(
+            time[None, :], T1[i:j], Tr[i:j], Ti1[i:j], Ti2[i:j],
+            mode_nonblood)
+    return signal
+
+
+def compute_SS_SI_VASO_steady_state(T1, Tr, Ti1, Ti2, mode_nonblood=False):
+    """Steady state VASO Mz right before each 90 degree pulse.
+
+    Mz is affine in M0_init, so one pulse pair maps M0_init to
+    a + b * M0_init. Its fixed point is the steady state M0_init (blood is
+    always fresh, i.e. M0_init = 1). All parameters broadcast.
+
+    Returns
+    -------
+    Mz_Ti1 : ndarray
+        Mz before the first 90 degree pulse (VASO readout).
+    Mz_Ti2 : ndarray
+        Mz before the second 90 degree pulse (BOLD readout).
+    """
+    T1, Tr, Ti1, Ti2 = np.broadcast_arrays(
+        *[np.asarray(p, dtype=float) for p in (T1, Tr, Ti1, Ti2)])
+    M0_equi = 1.
+    M0_init = np.ones(T1.shape)
+    if mode_nonblood:
+        E = np.exp(-(Tr - Ti2) / T1)
+        a = M0_equi * (1 - E)
+        b = np.cos(np.deg2rad(90)) * E
+        M0_init = a / (1 - b)
+
+    Mz_Ti1 = Mz(time=Ti1, M0_equi=M0_equi, M0_init=M0_init,
+                FA_rad=np.deg2rad(180), T1=T1)
+    Mz_Ti2 = Mz(time=Tr+Ti2-Ti1, M0_equi=M0_equi, M0_init=M0_init,
+                FA_rad=np.deg2rad(90), T1=T1)
+    return Mz_Ti1, Mz_Ti2
+
+
+def compute_SS_SI_VASO_null_Ti1(T1, Tr, Ti2, mode_nonblood=False):
+    """Inversion time Ti1 at which the steady state Mz crosses zero.
+
+    After the 180 degree pulse Mz(Ti1) = 0 has the closed form root
+    Ti1 = T1 * ln((M0_equi - M0_init * cos(180)) / M0_equi), so the root is
+    found for all (T1, Tr, Ti2) at once without iterating.
+    """
+    T1, Tr, Ti2 = np.broadcast_arrays(
+        *[np.asarray(p, dtype=float) for p in (T1, Tr, Ti2)])
+    M0_equi = 1.
+    M0_init = np.ones(T1.shape)
+    if mode_nonblood:
+        E = np.exp(-(Tr - Ti2) / T1)
+        M0_init = M0_equi * (1 - E) / (1 - np.cos(np.deg2rad(90)) * E)
+    return T1 * np.log((M0_equi - M0_init * np.cos(np.deg2rad(180)))
+                       / M0_equi)
+
+
+def compute_SS_SI_VASO_contrast(T1_ref, T1, Tr, Ti2):
+    """Blood nulling Ti1 and the steady state tissue Mz at both readouts.
+
+    Returns
+    -------
+    Ti1 : ndarray
+        Blood nulling inversion time for blood T1 (T1_ref).
+    Mz_Ti1 : ndarray
+        Tissue Mz at the VASO readout (blood Mz is zero there).
+    Mz_Ti2 : ndarray
+        Tissue Mz at the BOLD readout.
+    """
+    Ti1 = compute_SS_SI_VASO_null_Ti1(T1_ref, Tr, Ti2, mode_nonblood=False)
+    Mz_Ti1, Mz_Ti2 = compute_SS_SI_VASO_steady_state(T1, Tr, Ti1, Ti2,
+                                                     mode_nonblood=True)
+    return Ti1, Mz_Ti1, Mz_Ti2
+
+
+def compute_SS_SI_VASO_events(max_time, Tr, Ti1, Ti2):
+    """Times of the 180 degree and the two 90 degree pulses."""
+    event_180deg = np.arange(0, max_time, 2*Tr)
+    event_90deg_1 = np.arange(Ti1, max_time, 2*Tr)
+    event_90deg_2 = np.arange(Tr+Ti2, max_time, 2*Tr)
+    return event_180deg, event_90deg_1, event_90deg_2
+
+
+def compute_SS_SI_VASO_time_grid(max_time, T1, Tr, Ti1, Ti2, nr_points=401,
+                                 delta=1e-9):
+    """Event aware time samples for plotting the VASO Mz signal.
+
+    Every pulse event gets a sample right before (event - delta) and right
+    after (event + delta) it. Between events Mz is an exponential recovery
+    with curvature ~ exp(-t/T1), so the remaining samples are distributed
+    with a density ~ sqrt(curvature) = exp(-t/(2*T1)), which equalizes the
+    error of the linear interpolation done when plotting. The smallest T1 is
+    used when several are given. Each segment gets at least two samples,
+    so the number of samples can exceed nr_points for very many pulses.
+    """
+    T1 = np.min(T1)
+    events = np.concatenate(compute_SS_SI_VASO_events(max_time, Tr, Ti1, Ti2))
+    events = np.unique(events[(events > 0) & (events < max_time)])
+    bounds = np.concatenate(([0.], events, [max_time]))
+    nr_segments = bounds.size - 1
+
+    # Segment limits just after and before each event
+    start = bounds[:-1] + delta
+    stop = bounds[1:] - delta
+    start[0] = bounds[0]
+    stop[-1] = bounds[-1]
+    length = np.maximum(stop - start, 0)
+
+    # Share the point budget by the integral of the sampling density
+    weight = 1 - np.exp(-length / (2*T1))
+    extra = max(nr_points - 2*nr_segments, 0)
+    share = extra * weight / weight.sum() if weight.sum() > 0 \
+        else np.zeros(nr_segments)
+    counts = np.floor(share).astype(int)
+    remainder = extra - counts.sum()
+    counts[np.argsort(counts - share)[:remainder]] += 1
+    counts += 2
+
+    # Invert the cumulative density inside each segment
+    seg = np.repeat(np.arange(nr_segments), counts)
+    first = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    u = (np.arange(seg.size) - first[seg]) / (counts[seg] - 1)
+    tau = -2*T1 * np.log1p(-u * weight[seg])
+    return start[seg] + np.minimum(tau, length[seg])
@@ -0,0 +1,436 @@
+"""Matplotlib views of the models with persistent artists.
+
+Every view draws its axes once and afterwards only updates the data of its
+artists (set_data, set_offsets, bar heights), so the same view can be
+updated many times from slider callbacks or a batch renderer. Views take
+axes, never create windows, and work with any backend (e.g. Agg). Blitter
+redraws only the changed artists of interactive figures.
+"""
+import inspect
+from functools import partial
+import numpy as np
+from matplotlib.patches import Circle, Polygon
+from fmrilib.models import MODELS
+from fmrilib.complex_stats import CHANNELS, ComplexStatistics
+from fmrilib.rician import rician_pdf, phase_pdf
+from fmrilib.ring_buffer import RingBuffer
+from fmrilib.vaso import compute_SS_SI_VASO_events
+
+
+# =============================================================================
+def model_defaults(model):
+    """Default keyword parameters of a model in fmrilib.models.MODELS."""
+    return {p.name: p.default
+            for p in inspect.signature(MODELS[model]).parameters.values()}
+
+
+class View:
+    """Base class: keeps the parameters and recomputes the model on update.
+
+    Subclasses set `model` and implement `draw(results)`, which updates the
+    artists from the model results and returns the artists it changed.
+    """
+    model = None
+
+    def __init__(self, **params):
+        self.params = model_defaults(self.model)
+        self.params.update(params)
+
+    def compute(self, **params):
+        """Merge new parameters and run the model."""
+        self.params.update(params)
+        return MODELS[self.model](**self.params)
+
+    def update(self, **params):
+        """Recompute and redraw, returns the changed artists."""
+        return self.draw(self.compute(**params))
+
+    def show(self, results, **params):
+        """Draw results computed elsewhere (e.g. in a worker) for params."""
+        self.params.update(params)
+        return self.draw(results)
+
+    def draw(self, results):
+        raise NotImplementedError
+
+
+# =============================================================================
+class T2starView(View):
+    """T2* decay curve on top of the initial (red) curve."""
+    model = "t2star"
+    title = r"$S_0 * \exp(-t / T_{2}^*)$"
+
+    def __init__(self, ax, **params):
+        super().__init__(**params)
+        results = self.compute()
+        ax.set_title(self.title)
+        ax.set_xlabel("Time [ms]")
+        ax.set_ylabel("MRI signal")
+        ax.plot(results["time"], results["signal"], lw=3, color="red")
+        self.line, = ax.plot(results["time"], results["signal"], lw=3)
+        ax.margins(x=0)
+
+    def draw(self, results):
+        self.line.set_data(results["time"], results["signal"])
+        return [self.line]
+
+
+class Uludag2009View(T2starView):
+    """Intra and extravascular T2* decay."""
+    model = "uludag2009"
+    title = (r"$S_0 * \left((1 - CBV) * \exp(-t / T_{2,ex}^*) + "
+             r"CBV * \exp(-t / T_{2,in}^*) \right)$")
+
+
+# =============================================================================
+class ComplexNoiseView(View):
+    """Scatter of complex samples and, optionally, their four histograms.
+
+    The histograms use the fixed bins of ComplexStatistics and are drawn as
+    one polygon each; an update only changes the bar heights (from
+    np.histogram) and the exact magnitude and phase densities (Gudbjartsson
+    1995). With sticky_ylim the histogram y limits only change when the
+    peak leaves the upper half of the axes, so most interactive updates
+    can be blitted; otherwise every frame gets limits from its own peak.
+    """
+    model = "complex_noise"
+
+    def __init__(self, ax, hist_axes=None, sticky_ylim=False, **params):
+        super().__init__(**params)
+        self.sticky_ylim = sticky_ylim
+        ax.set_aspect('equal')
+        ax.set_xlabel('Re')
+        ax.set_ylabel('Im')
+        ax.set_title('Complex Signal')
+        ax.axhline(y=0, color='black', linestyle='-')
+        ax.axvline(x=0, color='black', linestyle='-')
+        ax.set_xlim([-150, 150])
+        ax.set_ylim([-150, 150])
+        self.scatter = ax.scatter([], [], s=3, alpha=1, color='black',
+                                  marker='o', linewidth=0)
+        self.line, = ax.plot([], [], color='black', linestyle='-',
+                             linewidth=0.5)
+        self.circle = Circle((0, 0), radius=1, color='black', fill=False,
+                             linestyle='-', linewidth=0.5)
+        ax.add_patch(self.circle)
+
+        self.hist_axes = None
+        if hist_axes is not None:
+            self.hist_axes = np.ravel(hist_axes)
+            self.stats = ComplexStatistics()
+            self.bars = []
+            titles = ('Real', 'Imag', 'Magnitude', 'Phase [deg]')
+            for hax, channel, title in zip(self.hist_axes, CHANNELS, titles):
+                edges = self.stats.edges(channel)
+                # All bars of a histogram are one polygon (one draw call)
+                bars = Polygon(np.zeros((1, 2)), closed=True,
+                               facecolor='C0', linewidth=0)
+                hax.add_patch(bars)
+                hax.set_xlim(edges[0], edges[-1])
+                hax.set_title(title)
+                self.bars.append(bars)
+            self.pdfs = [self.hist_axes[i].plot([], [], color='red',
+                                                linewidth=1)[0]
+                         for i in (2, 3)]
+        self.draw(self.compute())
+
+    def draw(self, results):
+        data = results["data"]
+        mean = self.params["mean_x"] + 1j * self.params["mean_y"]
+        std = self.params["std"]
+        self.scatter.set_offsets(np.column_stack([data.real, data.imag]))
+        self.line.set_data([0, mean.real], [0, mean.imag])
+        self.circle.set_center((mean.real, mean.imag))
+        self.circle.set_radius(std)
+        changed = [self.scatter, self.line, self.circle]
+        if self.hist_axes is None:
+            return changed
+
+        samples = (data.real, data.imag, results["magnitude"],
+                   results["phase"])
+        for hax, bars, channel, x in zip(self.hist_axes, self.bars, CHANNELS,
+                                         samples):
+            counts, _ = np.histogram(x, bins=self.stats.edges(channel))
+            xy = np.zeros((2 * counts.size + 2, 2))
+            xy[:, 0] = np.repeat(self.stats.edges(channel), 2)
+            xy[1:-1, 1] = np.repeat(counts, 2)
+            bars.set_xy(xy)
+            peak = max(counts.max(), 1)
+            if not self.sticky_ylim:
+                hax.set_ylim(0, peak * 1.05)
+            elif not 0.5 < peak / hax.get_ylim()[1] <= 1:
+                hax.set_ylim(0, peak * 1.25)
+            changed.append(bars)
+
+        # Exact distributions scaled to histogram counts
+        for line in self.pdfs:
+            line.set_visible(std > 0)
+        if std > 0:
+            x = np.linspace(0, 400, 801)
+            self.pdfs[0].set_data(
+                x, rician_pdf(x, np.abs(mean), std) * data.size * 2)
+            x = np.linspace(0, 360, 721)
+            dphi = np.deg2rad(x) - np.angle(mean)
+            self.pdfs[1].set_data(x, phase_pdf(dphi, np.abs(mean), std)
+                                  * data.size * np.deg2rad(2))
+        changed.extend(self.pdfs)
+        return changed
+
+
+# =============================================================================
+class DeltaBVesselView(View):
+    """Delta B map around a vessel as a single persistent image."""
+    model = "boxerman1995"
+
+    def __init__(self, ax, colorbar=True, **params):
+        super().__init__(**params)
+        self.image = ax.imshow(self.compute()["DeltaB"], cmap='twilight',
+                               origin='lower', vmin=-100, vmax=100)
+        ax.set_xlabel('X coordinate')
+        ax.set_ylabel('Y coordinate')
+        ax.set_title('Heatmap of Norms of 2D Coordinates')
+        ax.tick_params(bottom=False, top=False, left=False, right=False,
+                       labelbottom=False, labelleft=False)
+        ax.grid(False)
+        if colorbar:
+            cbar = ax.figure.colorbar(self.image, ax=ax,
+                                      orientation='vertical', fraction=0.046,
+                                      pad=0.06)
+            cbar.ax.yaxis.set_label_position('left')
+            cbar.set_label(r'$\Delta B_{vessel}$', loc="bottom", rotation=0)
+            cbar.ax.yaxis.label.set_y(-0.075)
+
+    def draw(self, results):
+        self.image.set_data(results["DeltaB"])
+        return [self.image]
+
+
+# =============================================================================
+class TwoComponentView(View):
+    """Intra and extravascular vectors and, optionally, their time series.
+
+    With ts_axes (three axes), every update appends the magnitude, phase
+    and angular diameter of the sum to a RingBuffer of `history` samples.
+    """
+    model = "two_component"
+
+    def __init__(self, ax, ts_axes=None, history=100, **params):
+        super().__init__(**params)
+        ax.set_aspect('equal')
+        ax.set_xlabel('Re')
+        ax.set_ylabel('Im')
+        ax.axhline(y=0, color='black', linestyle='-')
+        ax.axvline(x=0, color='black', linestyle='-')
+        ax.set_xlim([-150, 150])
+        ax.set_ylim([-150, 150])
+        self.vectors = [ax.plot([], [], linestyle='-', linewidth=1.5,
+                                color=color)[0]
+                        for color in ('gray', 'red', 'black')]
+        self.circle = Circle((0, 0), radius=self.params["radius"],
+                             color='black', fill=False, linestyle='-',
+                             linewidth=0.5)
+        ax.add_patch(self.circle)
+
+        self.ts_axes = ts_axes
+        results = self.compute()
+        if ts_axes is not None:
+            self.history = RingBuffer(3, history, fill=[
+                results["magnitude"][0], results["phase"][0], 50.])
+            self.ts_lines = []
+            labels = ('Magnitude', 'Phase', 'Angular Diameter')
+            for tax, label, ymax in zip(ts_axes, labels, (200, 360, 45)):
+                tax.set_xlabel('Time')
+                tax.set_ylabel(label)
+                tax.axhline(y=0, color='black', linestyle='-')
+                tax.axvline(x=0, color='black', linestyle='-')
+                tax.set_xlim([0, history])
+                tax.set_ylim([0, ymax])
+                self.ts_lines.append(tax.plot(
+                    np.arange(history), np.zeros(history), linestyle='-',
+                    linewidth=1.5, color='gray')[0])
+            self._draw_timeseries()
+        self._draw_vectors(results)
+
+    def _draw_vectors(self, results):
+        rad = np.deg2rad(self.params["deg_offset"])
+        vec1 = self.params["mag_iv"] * (np.cos(rad) + 1j * np.sin(rad))
+        vec3 = results["signal"][0]
+        for line, (a, b) in zip(self.vectors,
+                                ((0, vec1), (vec1, vec3), (0, vec3))):
+            line.set_data([np.real(a), np.real(b)], [np.imag(a), np.imag(b)])
+        self.circle.set_center((vec3.real, vec3.imag))
+        self.circle.set_radius(self.params["radius"])
+        return self.vectors + [self.circle]
+
+    def _draw_timeseries(self):
+        for line, values in zip(self.ts_lines, self.history.view()):
+            line.set_ydata(values)
+        return list(self.ts_lines)
+
+    def draw(self, results):
+        changed = self._draw_vectors(results)
+        if self.ts_axes is not None:
+            self.history.append([results[k][0] for k in
+                                 ("magnitude", "phase", "diameter")])
+            changed += self._draw_timeseries()
+        return changed
+
+
+# =============================================================================
+class VasoView(View):
+    """SS-SI-VASO Mz of tissue and blood with the RF pulse events.
+
+    The number of events depends on the parameters, so the pulse labels
+    are a pool of text artists that grows when needed and hides the rest.
+    """
+    model = "vaso"
+
+    def __init__(self, ax, **params):
+        super().__init__(**params)
+        self.ax = ax
+        self.tissue, = ax.plot([], [], lw=2, color="blue")
+        self.blood, = ax.plot([], [], lw=2, color="red")
+        ax.set_title("SI-SS-VASO")
+        ax.set_xlabel("Time [s]")
+        ax.set_ylabel(r"$M_z$")
+        ax.set_ylim([-1, 1])
+        ax.legend(['Tissue X', 'Blood'], loc="upper left")
+        self.zero, = ax.plot([], [], linestyle='solid', color='lightgray',
+                             zorder=0)
+        self.events = ax.vlines([], -1, 1, linestyle=':', color='gray',
+                                zorder=0)
+        self.labels = []
+        self.draw(self.compute())
+
+    def _label(self, i):
+        while len(self.labels) <= i:
+            self.labels.append(self.ax.text(
+                0, 0.02, "", rotation=90,
+                transform=self.ax.get_xaxis_transform()))
+        return self.labels[i]
+
+    def draw(self, results):
+        max_time = self.params["max_time"]
+        self.tissue.set_data(results["time"], results["tissue"])
+        self.blood.set_data(results["time"], results["blood"])
+        self.zero.set_data([0, max_time], [0, 0])
+        self.ax.set_xlim([0, max_time])
+
+        event_180deg, event_90deg_1, event_90deg_2 = \
+            compute_SS_SI_VASO_events(max_time, self.params["Tr"],
+                                      self.params["Ti1"], self.params["Ti2"])
+        events = np.concatenate([event_180deg, event_90deg_1, event_90deg_2])
+        self.events.set_segments([[(x, -1), (x, 1)] for x in events])
+        texts = ([r"$180\degree$ pulse"] * len(event_180deg)
+                 + [r"$90\degree$ pulse"] * (len(events) - len(event_180deg)))
+        for i, (x, text) in enumerate(zip(events, texts)):
+            label = self._label(i)
+            label.set_x(x)
+            label.set_text(text)
+            label.set_visible(True)
+        for label in self.labels[len(events):]:
+            label.set_visible(False)
+        return [self.tissue, self.blood, self.zero, self.events] + self.labels
+
+
+# =============================================================================
+class Turner2002View(View):
+    """Drained cortical area as a single point."""
+    model = "turner2002"
+
+    def __init__(self, ax, **params):
+        super().__init__(**params)
+        self.point, = ax.plot(0, self.compute()["area"], 'ro', label="Point")
+        ax.set_ylim(0, 1000)
+        ax.axhline(0, color='black', linewidth=0.5)
+        ax.axvline(0, color='black', linewidth=0.5)
+
+    def draw(self, results):
+        self.point.set_ydata(np.atleast_1d(results["area"]))
+        return [self.point]
+
+
+# =============================================================================
+class Blitter:
+    """Redraw only the changed artists of figures on a cached background.
+
+    Artists passed to `update` are marked animated, so a normal draw of the
+    figure renders only the static parts (axes, ticks, labels), which are
+    cached on every draw event. An update then restores the cache, draws
+    the animated artists and blits. A full draw is requested instead when
+    new artists appear, axes limits changed or the canvas cannot blit.
+    """
+
+    def __init__(self, *figures):
+        self._state = {}
+        for fig in figures:
+            self._state[fig] = {"artists": [], "background": None,
+                                "limits": None}
+            fig.canvas.mpl_connect("draw_event", partial(self._on_draw, fig))
+
+    @staticmethod
+    def _limits(fig):
+        return [tuple(ax.viewLim.bounds) for ax in fig.axes]
+
+    def _on_draw(self, fig, event):
+        state = self._state[fig]
+        state["background"] = fig.canvas.copy_from_bbox(fig.bbox)
+        state["limits"] = self._limits(fig)
+        self._draw_artists(fig)
+
+    def _draw_artists(self, fig):
+        for artist in self._state[fig]["artists"]:
+            if artist.get_visible():
+                fig.draw_artist(artist)
+
+    def update(self, artists):
+        """Show the new state of the given (changed) artists."""
+        changed = {}
+        for artist in artists:
+            changed.setdefault(artist.figure, []).append(artist)
+        for fig, fig_artists in changed.items():
+            state = self._state[fig]
+            new = [a for a in fig_artists if not a.get_animated()]
+            for artist in new:
+                artist.set_animated(True)
+            state["artists"].extend(new)
+
+            canvas = fig.canvas
+            if (new or state["background"] is None
+                    or not canvas.supports_blit
+                    or self._limits(fig) != state["limits"]):
+                canvas.draw_idle()
+                continue
+            canvas.restore_region(state["background"])
+            self._draw_artists(fig)
+            canvas.blit(fig.bbox)
+
+
+# =============================================================================
+def _single(view_class, figsize):
+    def make(fig, **params):
+        fig.set_size_inches(figsize)
+        return view_class(fig.add_subplot(1, 1, 1), **params)
+    return make
+
+
+def _complex_noise(fig, **params):
+    fig.set_size_inches(10.5, 4.)
+    grid = fig.add_gridspec(2, 3)
+    hist_axes = [fig.add_subplot(grid[i, j]) for i in (0, 1) for j in (1, 2)]
+    view = ComplexNoiseView(fig.add_subplot(grid[:, 0]), hist_axes, **params)
+    fig.tight_layout()
+    return view
+
+
+# Figure layouts of the views, keyed like fmrilib.models.MODELS. Each takes
+# an empty matplotlib Figure and model parameters and returns the view.
+FIGURES = {
+    "t2star": _single(T2starView, (6.4, 4.8)),
+    "uludag2009": _single(Uludag2009View, (6.4, 4.8)),
+    "complex_noise": _complex_noise,
+    "boxerman1995": _single(DeltaBVesselView, (6., 6.)),
+    "two_component": _single(TwoComponentView, (6., 6.)),
+    "vaso": _single(VasoView, (8., 4.8)),
+    "turner2002": _single(Turner2002View, (4.8, 4.8)),
+}
@@ -0,0 +1,44 @@
+"""Check the quadrant-symmetric and float32 modes of the vessel field map.
+
+compute_DeltaBvessel(symmetric=True) must equal the full map up to float64
+rounding, with exactly the same pixels inside the vessel. float32 maps must
+equal the float64 map up to float32 rounding. Errors are relative to the
+largest field value. Odd and even grids, a range of angles and radii, and
+maps written into a preallocated out array are covered. Needs fmrilib
+installed (pip install -e .).
+"""
+import itertools
+import numpy as np
+from fmrilib.boxerman import compute_DeltaBvessel, grid_geometry
+
+TOLERANCE_64 = 1e-12  # Relative error of the symmetric float64 map
+TOLERANCE_32 = 1e-6  # Relative error of the float32 map
+
+# =============================================================================
+failed = False
+for nr_points, theta_deg, R in itertools.product(
+        (101, 256, 1001), (0., 37., 90., 213.), (0., 2.5, 5.)):
+    reference = compute_DeltaBvessel(100., theta_deg, R, nr_points=nr_points)
+    symmetric = compute_DeltaBvessel(100., theta_deg, R, nr_points=nr_points,
+                                     symmetric=True)
+    out = np.empty((nr_points, nr_points), dtype=np.float32)
+    single = compute_DeltaBvessel(100., theta_deg, R, nr_points=nr_points,
+                                  symmetric=True, dtype=np.float32, out=out)
+    scale = max(np.abs(reference).max(), 1e-30)
+    error_64 = np.abs(symmetric - reference).max() / scale
+    error_32 = np.abs(single - reference).max() / scale
+    vessel = grid_geometry(nr_points=nr_points).norms <= R
+    same_vessel = (np.array_equal(symmetric[vessel], reference[vessel])
+                   and np.array_equal(single[vessel],
+                                      reference[vessel].astype(np.float32)))
+    ok = (same_vessel and single is out and error_64 <= TOLERANCE_64
+          and error_32 <= TOLERANCE_32)
+    if not ok:
+        print("FAILED nr_points={} theta={} R={}: same vessel {}, symmetric "
+              "error {:.2e}, float32 error {:.2e}".format(
+                  nr_points, theta_deg, R, same_vessel, error_64, error_32))
+    failed |= not ok
+
+if failed:
+    raise SystemExit("Symmetric or float32 maps differ from the reference.")
+print("OK")
@@ -0,0 +1,41 @@
+"""Check that chunked complex noise does not depend on the worker count.
+
+For a given seed and chunk size, fmrilib.complex_noise draws every chunk
+from its own generator, so the samples must be bit-identical whether the
+chunks are drawn in sequence or in any number of worker processes. Also
+checks the sample mean and standard deviation. Needs fmrilib installed
+(pip install -e .).
+"""
+import numpy as np
+from fmrilib.complex_noise import generate_complex_data
+
+NR_SAMPLES = 10**6 + 123  # Last chunk is partial
+CHUNK_SIZE = 2**16
+MEAN_X, MEAN_Y, STD = 100., -50., 20.
+
+# =============================================================================
+if __name__ == "__main__":
+    reference = generate_complex_data(NR_SAMPLES, MEAN_X, MEAN_Y, STD,
+                                      seed=42, chunk_size=CHUNK_SIZE)
+    failed = False
+    for nr_workers in (2, 3, 4):
+        data = generate_complex_data(NR_SAMPLES, MEAN_X, MEAN_Y, STD,
+                                     seed=42, chunk_size=CHUNK_SIZE,
+                                     nr_workers=nr_workers)
+        identical = np.array_equal(data, reference)
+        print("nr_workers={}: bit-identical {}".format(nr_workers, identical))
+        failed |= not identical
+
+    # Sample moments within 5 standard errors
+    se = STD / np.sqrt(NR_SAMPLES)
+    for name, x, mean in (("real", reference.real, MEAN_X),
+                          ("imag", reference.imag, MEAN_Y)):
+        print("{}: mean {:.4f} (expected {}), std {:.4f} (expected {})"
+              .format(name, x.mean(), mean, x.std(), STD))
+        failed |= abs(x.mean() - mean) > 5 * se
+        failed |= abs(x.std() - STD) > 5 * se / np.sqrt(2)
+
+    if failed:
+        raise SystemExit("Complex noise depends on the worker count or has "
+                         "wrong moments.")
+    print("OK")
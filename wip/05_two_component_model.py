@@ -1,134 +1,28 @@
 """Create two component complex vector."""
 
-import random
-import numpy as np
 import matplotlib
 import matplotlib.pyplot as plt
 from matplotlib.widgets import Slider, Button
-import tkinter as tk
+from fmrilib.views import TwoComponentView, Blitter
+from fmrilib.interactive import UpdateScheduler
 
 # =============================================================================
 # Initial parameters
 # =============================================================================
 MAG1 = 50
 DEG1 = 45
-RAD1 = DEG1 / 360 * 2 * np.pi
-VEC1 = MAG1 * np.cos(RAD1) + 1j * (MAG1 * np.sin(RAD1))
-
 MAG2 = 50
 DELTADEG = 30
-DEG2 = DEG1 - DELTADEG
-RAD2 = DEG2 / 360 * 2 * np.pi
-VEC2 = MAG2 * np.cos(RAD2) + 1j * (MAG2 * np.sin(RAD2))
-
-VEC3 = VEC1 + VEC2
-
-THETA = np.arctan(20 / np.abs(VEC3))
-THETA = THETA / (2*np.pi) * 360
 
-TS_MAG = np.full(100, np.abs(VEC3))
-TS_DEG = np.full(100, np.angle(VEC3) % (2*np.pi) * (180/np.pi))
-TS_THETA = np.full(100, 50.)
+HISTORY = 100  # Number of time points kept for the time series plots
 
 # =============================================================================
 # Functions
 # =============================================================================
-def plot_complex_data(ax, vector1, vector2, vector3):
-    ax.cla()
-    ax.set_aspect('equal')
-    ax.set_xlabel('Re')
-    ax.set_ylabel('Im')
-    ax.axhline(y=0, color='black', linestyle='-')
-    ax.axvline(x=0, color='black', linestyle='-')
-    ax.set_xlim([-150, 150])
-    ax.set_ylim([-150, 150])
-
-    # Vectors
-    ax.plot([0, vector1.real], [0, vector1.imag],
-        linestyle='-', linewidth=1.5, color='gray')
-    ax.plot([vector1.real, vector3.real], [vector1.imag, vector3.imag],
-        linestyle='-', linewidth=1.5, color='red')
-    ax.plot([0, vector3.real], [0, vector3.imag],
-        linestyle='-', linewidth=1.5, color='black')
-    fig1.canvas.draw_idle()
-
-    # Spread circle
-    circle = plt.Circle((vector3.real, vector3.imag), radius=20, color='black', 
-        fill=False, linestyle='-', linewidth=0.5, label='Circle')
-    ax.add_patch(circle)
-
-
-def plot_timeseries(ax, mag, deg, theta):
-    # Magnitude
-    ax[0].cla()
-    ax[0].set_xlabel('Time')
-    ax[0].set_ylabel('Magnitude')
-    ax[0].axhline(y=0, color='black', linestyle='-')
-    ax[0].axvline(x=0, color='black', linestyle='-')
-    ax[0].set_xlim([0, 100])
-    ax[0].set_ylim([0, 200])
-    ax[0].plot(np.arange(100), mag,
-        linestyle='-', linewidth=1.5, color='gray')
-
-    # Phase
-    ax[1].cla()
-    ax[1].set_xlabel('Time')
-    ax[1].set_ylabel('Phase')
-    ax[1].axhline(y=0, color='black', linestyle='-')
-    ax[1].axvline(x=0, color='black', linestyle='-')
-    ax[1].set_xlim([0, 100])
-    ax[1].set_ylim([0, 360])
-    print(deg)
-    ax[1].plot(np.arange(100), deg,
-        linestyle='-', linewidth=1.5, color='gray')
-
-    # Apparent diameter
-    ax[2].cla()
-    ax[2].set_xlabel('Time')
-    ax[2].set_ylabel('Angular Diameter')
-    ax[2].axhline(y=0, color='black', linestyle='-')
-    ax[2].axvline(x=0, color='black', linestyle='-')
-    ax[2].set_xlim([0, 100])
-    ax[2].set_ylim([0, 45])
-    print(theta)
-    ax[2].plot(np.arange(100), theta,
-        linestyle='-', linewidth=1.5, color='gray')
-
-    fig3.canvas.draw_idle()
-
-
-def update(val):
-    MAG1 = sMAG1.val
-    DEG1 = sDEG1.val
-    MAG2 = sMAG2.val
-    DELTADEG = sDELTADEG.val
-
-    # Compute complex vectors
-    RAD1 = DEG1 / 360 * 2 * np.pi
-    VEC1 = MAG1 * np.cos(RAD1) + 1j * (MAG1 * np.sin(RAD1))
-
-    DEG2 = DEG1 - DELTADEG
-    RAD2 = DEG2 / 360 * 2 * np.pi
-    VEC2 = MAG2 * np.cos(RAD2) + 1j * (MAG2 * np.sin(RAD2))
-
-    VEC3 = VEC1 + VEC2
-
-    plot_complex_data(ax1, VEC1, VEC2, VEC3)
-
-    global TS_MAG, TS_DEG, TS_THETA
-
-    TS_MAG = np.roll(TS_MAG, -1)
-    TS_MAG[-1] = np.abs(VEC3)
-
-    TS_DEG = np.roll(TS_DEG, -1)
-    TS_DEG[-1] = np.angle(VEC3) % (2*np.pi) * (180/np.pi)
-
-    TS_THETA = np.roll(TS_THETA, -1)
-    THETA = np.arctan(20 / np.abs(VEC3))
-    THETA = THETA / (2*np.pi) * 360
-    TS_THETA[-1] = THETA
-
-    plot_timeseries(fig3ax, TS_MAG, TS_DEG, TS_THETA)
+def update(MAG1, DEG1, MAG2, DELTADEG):
+    # Vectors and one new time point of the time series
+    blitter.update(view.update(mag_iv=MAG1, deg_offset=DEG1, mag_ex=MAG2,
+                               delta_deg=DELTADEG))
 
 
 def close_all(event):
@@ -145,9 +39,6 @@ fig1, (ax1) = plt.subplots(1, 1)
 manager = plt.get_current_fig_manager()
 manager.window.wm_geometry("600x600+0+0")
 
-# Plot
-plot_complex_data(ax1, VEC1, VEC2, VEC3)
-
 # =============================================================================
 # Plot Controls
 # =============================================================================
@@ -175,10 +66,9 @@ sDEG1 = Slider(axDEG1, "Phase Offset", 0, 360, valinit=DEG1, valstep=1)
 sMAG2 = Slider(axMAG2, "Mag ex", 0, 200, valinit=MAG2, valstep=1)
 sDELTADEG = Slider(axDELTADEG, "Delta", 0, 360, valinit=DELTADEG, valstep=1)
 
-sMAG1.on_changed(update)
-sDEG1.on_changed(update)
-sMAG2.on_changed(update)
-sDELTADEG.on_changed(update)
+# One update (one time point) per frame with the latest slider values
+scheduler = UpdateScheduler(fig2, update, {
+    "MAG1": sMAG1, "DEG1": sDEG1, "MAG2": sMAG2, "DELTADEG": sDELTADEG})
 
 # -----------------------------------------------------------------------------
 # Buttons
@@ -196,6 +86,11 @@ fig3, fig3ax = plt.subplots(1, 3)
 manager = plt.get_current_fig_manager()
 manager.window.wm_geometry("1225x250+0+670")
 
+# Vectors, spread circle and time series are persistent artists
+view = TwoComponentView(ax1, ts_axes=fig3ax, history=HISTORY, mag_iv=MAG1,
+                        deg_offset=DEG1, mag_ex=MAG2, delta_deg=DELTADEG)
+blitter = Blitter(fig1, fig3)
+
 # -----------------------------------------------------------------------------
 # Show plot
 plt.show()
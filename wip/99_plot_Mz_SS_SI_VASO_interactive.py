@@ -19,117 +19,25 @@ primary visual cortex. Human Brain Mapping hbm.26094.
 https://doi.org/10.1002/hbm.26094
 
 """
-import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.widgets import Slider
+from fmrilib.views import VasoView, Blitter
+from fmrilib.interactive import UpdateScheduler, BackgroundCompute
 
 
 # =============================================================================
-# Functions that will be put into the library
+# Functions
 # =============================================================================
-def Mz(time, M0_equi, M0_init, FA_rad, T1):
-    """Longitudinal magnetization."""
-    return M0_equi - (M0_equi - M0_init * np.cos(FA_rad)) * np.exp(-time/T1)
-
-
-def compute_SS_SI_VASO_Mz_signal(time, T1, Tr, Ti1, Ti2, mode_nonblood=False):
-    """Compute VASO Mz signal."""
-    signal = np.zeros(time.shape)
-    M0_equi = 1.  # This never changes
-    M0_init = 1.
-
-    # Prepare condition array
-    cond = np.full(time.shape, 3)
-    idx2 = time % (Tr*2) < (Ti2+Tr)  # Stages after 180 deg pulse
-    idx1 = time % (Tr*2) < Ti1  # Stages after the first 90 deg pulse
-    cond[idx2] = 2
-    cond[idx1] = 1
-    for i, t in enumerate(time):
-        t %= 2*Tr
-        # ---------------------------------------------------------------------
-        # Handle first signal separately
-        # ---------------------------------------------------------------------
-        if i == 0:
-            signal[i] = Mz(time=t, M0_equi=M0_equi, M0_init=M0_init,
-                           FA_rad=np.deg2rad(180), T1=T1)
-        # ---------------------------------------------------------------------
-        # After 180 degree pulse
-        # ---------------------------------------------------------------------
-        elif cond[i] == 1:
-            if mode_nonblood:
-                if cond[i] != cond[i-1]:  # Update M0 upon condition switch
-                    M0_init = Mz(time=Tr-Ti2, M0_equi=M0_equi, M0_init=M0_init,
-                                 FA_rad=np.deg2rad(90), T1=T1)
-            signal[i] = Mz(time=t, M0_equi=M0_equi, M0_init=M0_init,
-                           FA_rad=np.deg2rad(180), T1=T1)
-        # ---------------------------------------------------------------------
-        # After the first 90 degree pulse
-        # ---------------------------------------------------------------------
-        elif cond[i] == 2:
-            signal[i] = Mz(time=t-Ti1, M0_equi=M0_equi, M0_init=M0_init,
-                           FA_rad=np.deg2rad(90), T1=T1)
-        # ---------------------------------------------------------------------
-        # After the second 90 degree pulse
-        # ---------------------------------------------------------------------
-        else:
-            signal[i] = Mz(time=t-Tr-Ti2, M0_equi=M0_equi, M0_init=M0_init,
-                           FA_rad=np.deg2rad(90), T1=T1)
-    return signal
-
-
-def plot_SS_SI_VASO_Mz_signal(ax, max_time, T1_ref, T1, Tr, Ti1, Ti2):
-    """Protocol to plot VASO longitudinal magnetization."""
-    time = np.linspace(0, max_time, 1001)
-    signal1 = compute_SS_SI_VASO_Mz_signal(time, T1, Tr, Ti1, Ti2,
-                                           mode_nonblood=True)
-    signal2 = compute_SS_SI_VASO_Mz_signal(time, T1_ref, Tr, Ti1, Ti2,
-                                           mode_nonblood=False)
-
-    ax.cla()
-    ax.plot(time, signal1, lw=2, color="blue")
-    ax.plot(time, signal2, lw=2, color="red")
-
-    ax.set_title("SI-SS-VASO")
-    ax.set_xlabel("Time [s]")
-    ax.set_ylabel(r"$M_z$")
-    ax.set_xlim([0, max_time])
-    ax.set_ylim([-1, 1])
-    ax.legend(['Tissue X', 'Blood'], loc="upper left")
-
-    # -------------------------------------------------------------------------
-    # Horizontal lines
-    ax.hlines([0], 0, max_time, linestyle='solid', color='lightgray', zorder=0)
-
-    # Vertical lines
-    trans = ax.get_xaxis_transform()
-
-    event_180deg = np.arange(0, max_time, 2*Tr)
-    ax.vlines(event_180deg, -1, 1, linestyle=':', color='gray', zorder=0)
-    for x in event_180deg:
-        ax.text(x, 0.02, r"$180\degree$ pulse", rotation=90, transform=trans)
-
-    event_90deg_1 = np.arange(Ti1, max_time, 2*Tr)
-    for x in event_90deg_1:
-        ax.text(x, 0.02, r"$90\degree$ pulse", rotation=90, transform=trans)
-    ax.vlines(event_90deg_1, -1, 1, linestyle=':', color='gray', zorder=0)
-
-    event_90deg_2 = np.arange(Tr+Ti2, max_time, 2*Tr)
-    for x in event_90deg_2:
-        ax.text(x, 0.02, r"$90\degree$ pulse", rotation=90, transform=trans)
-    ax.vlines(event_90deg_2, -1, 1, linestyle=':', color='gray', zorder=0)
-
-
-def update(val):
-    """Update plot data after each slider interaction."""
-    T1 = sT1.val
-    max_time = sTime.val
-    Ti1 = sTi1.val
-    Ti2 = sTi2.val
-    Tr = sTr.val
-
-    plot_SS_SI_VASO_Mz_signal(ax1, max_time, T1_ref=T1b, T1=T1, Tr=Tr,
-                              Ti1=Ti1, Ti2=Ti2)
-    fig1.canvas.draw_idle()
+def update(T1, max_time, Ti1, Ti2, Tr):
+    """Update plot data after slider interactions."""
+    # Computed in a worker process, the plot is updated by show()
+    worker.submit(**dict(view.params, T1=T1, max_time=max_time, Ti1=Ti1,
+                         Ti2=Ti2, Tr=Tr))
+
+
+def show(results, params):
+    """Draw the results of the worker."""
+    blitter.update(view.show(results, **params))
 
 
 # =============================================================================
@@ -143,15 +51,16 @@ Ti2 = 1.7
 Tr = 2.
 
 max_time = 5 * Tr
-time = np.linspace(0, max_time, 1001)
 
 # =============================================================================
 # Plotting
 # =============================================================================
 # Prepare figure
 fig1, (ax1) = plt.subplots(1, 1)
-plot_SS_SI_VASO_Mz_signal(ax1, max_time, T1_ref=T1b, T1=T1gm, Tr=Tr,
-                          Ti1=Ti1, Ti2=Ti2)
+view = VasoView(ax1, max_time=max_time, T1_ref=T1b, T1=T1gm, Tr=Tr, Ti1=Ti1,
+                Ti2=Ti2)
+blitter = Blitter(fig1)
+worker = BackgroundCompute(fig1, "vaso", show)
 
 # -----------------------------------------------------------------------------
 # Sliders
@@ -172,10 +81,8 @@ sTi1 = Slider(axTi1, r"$Ti_1$", 0, 6.0, valinit=Ti1, valstep=0.1)
 sTi2 = Slider(axTi2, r"$Ti_2$", 0, 6.0, valinit=Ti2, valstep=0.1)
 sTr = Slider(axTr, r"$Tr$", 0, 6.0, valinit=Tr, valstep=0.1)
 
-sT1.on_changed(update)
-sTime.on_changed(update)
-sTi1.on_changed(update)
-sTi2.on_changed(update)
-sTr.on_changed(update)
+# One update per frame with the latest slider values
+scheduler = UpdateScheduler(fig2, update, {
+    "T1": sT1, "max_time": sTime, "Ti1": sTi1, "Ti2": sTi2, "Tr": sTr})
 
 plt.show()
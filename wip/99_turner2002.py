@@ -1,10 +1,9 @@
 """Create two component complex vector."""
 
-import numpy as np
-import matplotlib
 import matplotlib.pyplot as plt
-from matplotlib.widgets import Slider, Button
-import tkinter as tk
+from matplotlib.widgets import Slider
+from fmrilib.turner2002 import turner2022_eq4
+from fmrilib.interactive import UpdateScheduler
 
 # =============================================================================
 # Initial parameters
@@ -15,13 +14,6 @@ CAP_DIAMETER = 5  # capillary diameter in millimeters
 VES_DIAMETER = 0.6  # millimeter
 THICKNESS = 3  # cortical thickness in mm
 
-# =============================================================================
-# Functions
-# =============================================================================
-def turner2022_eq4(beta, d_c, l_c, d_v, t):
-    """How much activated area a vein can drain?"""
-    return (np.pi / (4*beta*d_c)) * d_v**3 * l_c / t
-
 # =============================================================================
 # Plot
 # =============================================================================
@@ -65,23 +57,16 @@ slider5 = Slider(ax5, r"Thickness, $t$ [mm]", 2, 4,
                  valinit=THICKNESS, valstep=0.1)
 
 # Update function for sliders
-def update(val):
-    BETA = slider1.val
-    CAP_LENGTH = slider2.val
-    CAP_DIAMETER = slider3.val
-    VES_DIAMETER = slider4.val
-    THICKNESS = slider5.val
+def update(BETA, CAP_LENGTH, CAP_DIAMETER, VES_DIAMETER, THICKNESS):
     y_new = turner2022_eq4(beta=BETA, d_c=CAP_DIAMETER, l_c=CAP_LENGTH, 
                            d_v=VES_DIAMETER, t=THICKNESS)
     point.set_ydata([y_new])
     fig.canvas.draw_idle()
 
-# Connect sliders to update function
-slider1.on_changed(update)
-slider2.on_changed(update)
-slider3.on_changed(update)
-slider4.on_changed(update)
-slider5.on_changed(update)
+# Connect sliders to update function, one update per frame
+scheduler = UpdateScheduler(fig, update, {
+    "BETA": slider1, "CAP_LENGTH": slider2, "CAP_DIAMETER": slider3,
+    "VES_DIAMETER": slider4, "THICKNESS": slider5})
 
 ax.grid(axis='y', linestyle='--', color='gray')
 ax.get_xaxis().set_visible(False)  # Hide the y-axis